@@ -0,0 +1,124 @@
+"""
+Benchmark the dark background croppers: pillow, opencv and numpy.
+
+Usage:
+    python benchmarks/bench_crop.py --pages 20 --dpi 300 [--json out.json]
+"""
+
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import click
+from PIL import Image, ImageDraw
+
+from pdfwtf.utils.common import crop_dark_background, crop_dark_background_image
+
+TOOLS = ["pillow", "opencv", "numpy"]
+
+
+def make_scan(path: Path, dpi: int = 300, seed: int = 0):
+    """A4 page with text-like lines lying on a dark scanner background."""
+    page_w, page_h = int(8.27 * dpi), int(11.69 * dpi)
+    margin = dpi // 2
+
+    img = Image.new("RGB", (page_w + 2 * margin, page_h + 2 * margin), (25, 25, 25))
+    page = Image.new("RGB", (page_w, page_h), (238, 236, 230))
+
+    draw = ImageDraw.Draw(page)
+    line_h = dpi // 6
+    for i, y in enumerate(range(dpi, page_h - dpi, line_h)):
+        width = page_w - 2 * dpi - ((i * 37 + seed * 11) % (dpi * 2))
+        draw.rectangle([dpi, y, dpi + width, y + line_h // 3], fill=(40, 40, 40))
+
+    img.paste(page, (margin + seed % 7, margin))
+    img.save(path)
+
+
+def time_detection(tool: str, sources: list) -> float | None:
+    """Time the in-memory crop only - no decoding or encoding."""
+    if tool == "opencv":
+        return None
+
+    images = []
+    for src in sources:
+        with Image.open(src) as img:
+            images.append(img.copy())
+
+    started = time.perf_counter()
+    for img in images:
+        crop_dark_background_image(img, tool=tool)
+
+    return round(time.perf_counter() - started, 3)
+
+
+def run_tool(tool: str, sources: list, work_dir: Path) -> dict:
+    tool_dir = work_dir / tool
+    tool_dir.mkdir()
+    paths = []
+    for src in sources:
+        dst = tool_dir / src.name
+        shutil.copy2(src, dst)
+        paths.append(dst)
+
+    started = time.perf_counter()
+    try:
+        cropped = crop_dark_background(paths, tool=tool)
+    except Exception as e:
+        return {"tool": tool, "pages": len(paths), "error": f"{type(e).__name__}: {e}"}
+    elapsed = time.perf_counter() - started
+
+    with Image.open(paths[0]) as img:
+        size = img.size
+
+    return {
+        "tool": tool,
+        "pages": len(paths),
+        "cropped": cropped,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(len(paths) / elapsed, 2) if elapsed else None,
+        "first_page_size": list(size),
+        "detect_seconds": time_detection(tool, sources),
+    }
+
+
+@click.command()
+@click.option("--pages", default=10, type=click.IntRange(1))
+@click.option("--dpi", default=300, type=click.IntRange(72, 1200))
+@click.option("--tool", "tools", multiple=True, type=click.Choice(TOOLS))
+@click.option("--json", "json_path", type=click.Path(dir_okay=False))
+def main(pages, dpi, tools, json_path):
+    tools = list(tools) or TOOLS
+
+    with tempfile.TemporaryDirectory(prefix="pdfwtf-bench-") as tmp:
+        work_dir = Path(tmp)
+        src_dir = work_dir / "src"
+        src_dir.mkdir()
+
+        sources = []
+        for i in range(1, pages + 1):
+            path = src_dir / f"page_{str(i).zfill(3)}.png"
+            make_scan(path, dpi=dpi, seed=i)
+            sources.append(path)
+
+        results = [run_tool(tool, sources, work_dir) for tool in tools]
+
+    for r in results:
+        if "error" in r:
+            click.echo(f"{r['tool']:<8} failed - {r['error']}")
+            continue
+        click.echo(
+            f"{r['tool']:<8} {r['seconds']:>8} s  {r['pages_per_sec']:>8} pages/s  "
+            f"in-memory {r['detect_seconds']} s  "
+            f"cropped {r['cropped']}/{r['pages']}  size {r['first_page_size']}"
+        )
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"dpi": dpi, "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
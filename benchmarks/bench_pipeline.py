@@ -0,0 +1,190 @@
+"""
+Benchmark process_pdf and its stages on the synthetic corpus.
+
+Results (pages/s, MB/s) are tagged with the current commit, so JSON files
+from different commits can be compared side by side.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--pages 10] [--case text] \
+        [--stage export_text] [--repeat 3] [--json out.json]
+"""
+
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+from corpus import build_corpus
+from pdfwtf.pipeline import export_images, export_text, process_pdf
+from pdfwtf.utils.analyze import is_scanned_or_hybrid
+from pdfwtf.utils.common import count_pdf_pages, crop_dark_background, extract_pages
+
+STAGES = [
+    "is_scanned_or_hybrid",
+    "extract_pages",
+    "export_images",
+    "crop_dark_background",
+    "export_text",
+    "process_pdf",
+]
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return result.stdout.strip()
+
+
+def _fresh_dir(path: Path) -> Path:
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True)
+    return path
+
+
+def stage_runner(stage: str, pdf: Path, work_dir: Path, dpi: int, jobs: int):
+    """Returns (setup, run) - setup is not timed, run is."""
+    out_dir = work_dir / stage
+
+    if stage == "is_scanned_or_hybrid":
+        return None, lambda: is_scanned_or_hybrid(pdf)
+
+    if stage == "extract_pages":
+        keep = list(range(1, count_pdf_pages(pdf) + 1, 2))
+        return None, lambda: extract_pages(
+            pdf, work_dir / "extract.pdf", pages_to_keep=keep
+        )
+
+    if stage == "export_images":
+        return None, lambda: export_images(pdf, out_dir, dpi=dpi, jobs=jobs)
+
+    if stage == "crop_dark_background":
+        images_dir = work_dir / "crop-src"
+
+        def setup():
+            export_images(pdf, images_dir, dpi=dpi, jobs=jobs)
+            _fresh_dir(out_dir)
+            for src in images_dir.glob("*.png"):
+                shutil.copy2(src, out_dir / src.name)
+
+        return setup, lambda: crop_dark_background(sorted(out_dir.glob("*.png")))
+
+    if stage == "export_text":
+        return None, lambda: export_text(pdf, out_dir)
+
+    if stage == "process_pdf":
+        return (
+            lambda: _fresh_dir(out_dir),
+            lambda: process_pdf(
+                pdf,
+                out_dir,
+                dpi=dpi,
+                render_jobs=jobs,
+                export_texts_flag=True,
+                no_cache_flag=True,
+            ),
+        )
+
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def run_stage(stage, case, pdf: Path, work_dir: Path, dpi, jobs, repeat) -> dict:
+    pages = count_pdf_pages(pdf)
+    size_mb = pdf.stat().st_size / 1e6
+    result = {"case": case, "stage": stage, "pages": pages, "mb": round(size_mb, 3)}
+
+    timings = []
+    try:
+        setup, run = stage_runner(stage, pdf, work_dir, dpi, jobs)
+        for _ in range(repeat):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    best = min(timings)
+    result.update(
+        {
+            "seconds": round(best, 4),
+            "pages_per_sec": round(pages / best, 2) if best else None,
+            "mb_per_sec": round(size_mb / best, 2) if best else None,
+        }
+    )
+
+    return result
+
+
+@click.command()
+@click.option("--pages", default=10, type=click.IntRange(1))
+@click.option("--large-pages", default=200, type=click.IntRange(1))
+@click.option("--dpi", default=150, type=click.IntRange(72, 1200))
+@click.option("--jobs", default=1, type=click.IntRange(1))
+@click.option("--repeat", default=1, type=click.IntRange(1))
+@click.option("--case", "cases", multiple=True)
+@click.option("--stage", "stages", multiple=True, type=click.Choice(STAGES))
+@click.option("--corpus", "corpus_dir", type=click.Path(file_okay=False))
+@click.option("--json", "json_path", type=click.Path(dir_okay=False))
+def main(pages, large_pages, dpi, jobs, repeat, cases, stages, corpus_dir, json_path):
+    stages = list(stages) or STAGES
+
+    with tempfile.TemporaryDirectory(prefix="pdfwtf-bench-") as tmp:
+        # A given --corpus directory is kept and reused across runs
+        corpus = build_corpus(
+            Path(corpus_dir or Path(tmp) / "corpus"),
+            pages=pages,
+            large_pages=large_pages,
+        )
+        selected = {k: v for k, v in corpus.items() if not cases or k in cases}
+
+        results = []
+        for case, pdf in selected.items():
+            for stage in stages:
+                work_dir = _fresh_dir(Path(tmp) / "work")
+                results.append(run_stage(stage, case, pdf, work_dir, dpi, jobs, repeat))
+
+    for r in results:
+        if "error" in r:
+            click.echo(f"{r['case']:<16} {r['stage']:<22} failed - {r['error']}")
+            continue
+        click.echo(
+            f"{r['case']:<16} {r['stage']:<22} {r['seconds']:>9} s  "
+            f"{r['pages_per_sec']:>9} pages/s  {r['mb_per_sec']:>8} MB/s"
+        )
+
+    if json_path:
+        report = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {
+                "pages": pages,
+                "large_pages": large_pages,
+                "dpi": dpi,
+                "jobs": jobs,
+                "repeat": repeat,
+            },
+            "results": results,
+        }
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
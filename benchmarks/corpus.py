@@ -0,0 +1,150 @@
+"""
+Synthetic PDF corpus for the benchmarks - generated offline, deterministic.
+
+Usage:
+    python benchmarks/corpus.py OUT_DIR [--pages 10] [--large-pages 200]
+"""
+
+from pathlib import Path
+
+import click
+import fitz  # PyMuPDF
+from PIL import Image
+
+A4 = (595, 842)
+
+LINE = (
+    "The quick brown fox jumps over the lazy dog while the committee "
+    "reviews paper {page} - doi.org/10.5555/bench.{page}"
+)
+
+
+def _text_page(doc, page_number: int, size=A4):
+    page = doc.new_page(width=size[0], height=size[1])
+    y = 72
+    while y < size[1] - 72:
+        page.insert_text((72, y), LINE.format(page=page_number), fontsize=9)
+        y += 14
+    return page
+
+
+def _scan_image(page_number: int, dpi: int, size=A4, rotate=0, dark_bg=True):
+    """Render a text page to a bitmap, as a scanner would deliver it."""
+    src = fitz.open()
+    _text_page(src, page_number, size=size)
+    pix = src[0].get_pixmap(dpi=dpi)
+    img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    src.close()
+
+    if dark_bg:
+        margin = dpi // 4
+        bg = Image.new(
+            "RGB", (img.width + 2 * margin, img.height + 2 * margin), (30, 30, 30)
+        )
+        bg.paste(img, (margin, margin))
+        img = bg
+
+    if rotate:
+        img = img.rotate(rotate, expand=True)
+
+    return img
+
+
+def _insert_scan(doc, img: Image.Image, dpi: int):
+    width, height = img.width * 72 / dpi, img.height * 72 / dpi
+    page = doc.new_page(width=width, height=height)
+
+    pix = fitz.Pixmap(fitz.csRGB, img.width, img.height, img.tobytes(), False)
+    page.insert_image(page.rect, pixmap=pix)
+
+    return page
+
+
+def make_text_pdf(path: Path, pages: int):
+    doc = fitz.open()
+    for i in range(1, pages + 1):
+        _text_page(doc, i)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def make_scan_pdf(path: Path, pages: int, dpi: int, rotate_every=0, spread=False):
+    """
+    Image-only PDF.
+
+    :param rotate_every: rotate every n-th page by 90 degrees
+    :param spread: landscape double-page spreads (two pages per sheet)
+    """
+    doc = fitz.open()
+    for i in range(1, pages + 1):
+        rotate = 90 if rotate_every and i % rotate_every == 0 else 0
+        if spread:
+            left = _scan_image(2 * i - 1, dpi, dark_bg=False)
+            right = _scan_image(2 * i, dpi, dark_bg=False)
+            img = Image.new("RGB", (left.width * 2, left.height), (30, 30, 30))
+            img.paste(left, (0, 0))
+            img.paste(right, (left.width, 0))
+        else:
+            img = _scan_image(i, dpi, rotate=rotate)
+        _insert_scan(doc, img, dpi)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def make_hybrid_pdf(path: Path, pages: int, dpi: int):
+    """Every other page is a scan - the rest carry a text layer."""
+    doc = fitz.open()
+    for i in range(1, pages + 1):
+        if i % 2:
+            _insert_scan(doc, _scan_image(i, dpi), dpi)
+        else:
+            _text_page(doc, i)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def build_corpus(out_dir: Path, pages=10, large_pages=200, dpis=(150, 300)) -> dict:
+    """
+    Write the corpus to out_dir - returns {case name: pdf path}.
+
+    The file names carry the page count and DPI, so a reused out_dir never
+    serves files generated with other parameters.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    cases = {}
+
+    def add(name, maker, pages, dpi=None, **kwargs):
+        stem = f"{name}-{pages}p" + (f"-{dpi}dpi" if dpi else "")
+        path = out_dir / f"{stem}.pdf"
+        if not path.exists():
+            maker(path, pages, *([dpi] if dpi else []), **kwargs)
+        cases[name] = path
+
+    add("text", make_text_pdf, pages)
+    for dpi in dpis:
+        add(f"scan-{dpi}", make_scan_pdf, pages, dpi)
+    add("hybrid", make_hybrid_pdf, pages, dpis[0])
+    add("rotated", make_scan_pdf, pages, dpis[0], rotate_every=2)
+    add("spread", make_scan_pdf, max(1, pages // 2), dpis[0], spread=True)
+    add(f"text-large-{large_pages}", make_text_pdf, large_pages)
+
+    return cases
+
+
+@click.command()
+@click.argument("out_dir", type=click.Path(file_okay=False))
+@click.option("--pages", default=10, type=click.IntRange(1))
+@click.option("--large-pages", default=200, type=click.IntRange(1))
+@click.option("--dpi", "dpis", multiple=True, type=click.IntRange(72, 1200))
+def main(out_dir, pages, large_pages, dpis):
+    cases = build_corpus(
+        Path(out_dir), pages=pages, large_pages=large_pages, dpis=dpis or (150, 300)
+    )
+    for name, path in cases.items():
+        click.echo(f"{name:<16} {path.stat().st_size / 1e6:>8.2f} MB  {path}")
+
+
+if __name__ == "__main__":
+    main()
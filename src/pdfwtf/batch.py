@@ -0,0 +1,171 @@
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List
+
+from pdfwtf.pipeline import process_pdf
+from pdfwtf.utils.common import get_output_dir_final, write_json
+
+SUMMARY_JSON = "batch.summary.json"
+
+
+def collect_input_files(
+    input_dir: Path = None,
+    pattern: str = "*.pdf",
+    file_list: Path = None,
+    recursive: bool = True,
+) -> List[Path]:
+    """
+    Collect input PDFs from a directory (glob pattern) and/or a file list.
+
+    :param input_dir: directory to search
+    :param pattern: glob pattern relative to input_dir
+    :param file_list: text file with one PDF path per line (# for comments)
+    :param recursive: search input_dir recursively
+    :return: sorted list of unique resolved paths
+    """
+    files = []
+
+    if input_dir:
+        input_dir = Path(input_dir)
+        found = input_dir.rglob(pattern) if recursive else input_dir.glob(pattern)
+        files.extend(p for p in found if p.is_file())
+
+    if file_list:
+        for line in Path(file_list).read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                files.append(Path(line))
+
+    unique = {p.resolve() for p in files}
+
+    return sorted(unique)
+
+
+def batch_path_prefix(input_files: List[Path], input_dir: Path = None):
+    """
+    Input path prefix that keeps the outputs of a batch apart - input_dir
+    when it holds all files, else their common parent. None (flat output)
+    for files without input_dir and with unique names.
+    """
+    if input_dir:
+        input_dir = Path(input_dir).resolve()
+        if all(p.is_relative_to(input_dir) for p in input_files):
+            return str(input_dir)
+    elif len({p.name for p in input_files}) == len(input_files):
+        return None
+
+    return os.path.commonpath([p.parent for p in input_files])
+
+
+def check_output_paths(
+    input_files: List[Path], output_dir: Path, input_path_prefix: str = None
+):
+    """Raise ValueError when two inputs would write the same output PDF."""
+    seen = {}
+    for input_pdf in input_files:
+        output_pdf = (
+            get_output_dir_final(output_dir, input_pdf, input_path_prefix, create=False)
+            / input_pdf.name
+        )
+        if output_pdf in seen:
+            raise ValueError(
+                f"'{seen[output_pdf]}' and '{input_pdf}' would both be written "
+                f"to '{output_pdf}'"
+            )
+        seen[output_pdf] = input_pdf
+
+
+def _process_one(input_pdf: Path, output_dir: Path, options: dict) -> dict:
+    """Run process_pdf for one file and report the outcome instead of raising."""
+    result = {"input": str(input_pdf), "status": "ok", "error": None}
+    started = time.perf_counter()
+
+    try:
+        process_pdf(input_pdf, output_dir, **options)
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        if options.get("debug_flag"):
+            result["traceback"] = traceback.format_exc()
+
+    result["elapsed"] = round(time.perf_counter() - started, 3)
+
+    return result
+
+
+def run_batch(
+    input_files: List[Path],
+    output_dir: Path,
+    workers: int = None,
+    max_tasks_per_child: int = None,
+    summary_json: Path = None,
+    **options,
+) -> dict:
+    """
+    Process many PDFs in a process pool and write a summary JSON.
+
+    :param input_files: PDFs to process
+    :param output_dir: base output directory
+    :param workers: number of worker processes (default: CPU count),
+        1 runs everything in the current process
+    :param max_tasks_per_child: recycle a worker after this many files
+    :param summary_json: summary path (default: <output_dir>/batch.summary.json)
+    :param options: keyword arguments passed to process_pdf
+    :return: summary dict
+    :raises ValueError: when inputs would overwrite each other's outputs
+    """
+    output_dir = Path(output_dir)
+    check_output_paths(input_files, output_dir, options.get("input_path_prefix"))
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(input_files) or 1))
+
+    started = time.perf_counter()
+    results = {}
+
+    if workers == 1:
+        for input_pdf in input_files:
+            results[input_pdf] = _process_one(input_pdf, output_dir, options)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, max_tasks_per_child=max_tasks_per_child
+        ) as executor:
+            futures = {
+                executor.submit(_process_one, input_pdf, output_dir, options): input_pdf
+                for input_pdf in input_files
+            }
+            for future in as_completed(futures):
+                input_pdf = futures[future]
+                try:
+                    results[input_pdf] = future.result()
+                except Exception as e:
+                    # Worker crashed (e.g. BrokenProcessPool) - record and go on
+                    results[input_pdf] = {
+                        "input": str(input_pdf),
+                        "status": "failed",
+                        "error": f"{type(e).__name__}: {e}",
+                        "elapsed": None,
+                    }
+
+    file_results = [results[p] for p in input_files]
+    failed = sum(1 for r in file_results if r["status"] != "ok")
+
+    summary = {
+        "total": len(file_results),
+        "ok": len(file_results) - failed,
+        "failed": failed,
+        "workers": workers,
+        "elapsed": round(time.perf_counter() - started, 3),
+        "files": file_results,
+    }
+
+    if summary_json is None:
+        summary_json = output_dir / SUMMARY_JSON
+    summary_json = Path(summary_json)
+    summary_json.parent.mkdir(parents=True, exist_ok=True)
+    write_json(summary, summary_json)
+
+    return summary
@@ -1,7 +1,10 @@
 import click
 import sys
+from pathlib import Path
 from pydantic import BaseModel
-from pdfwtf.pipeline import process_pdf
+from pdfwtf.batch import batch_path_prefix, collect_input_files, run_batch
+from pdfwtf.pipeline import TEXT_STRUCTURES, THUMB_FORMATS, process_pdf
+from pdfwtf.utils.cache import DEFAULT_CACHE_SIZE_MB
 from pdfwtf.utils.common import get_output_dir
 
 
@@ -9,18 +12,43 @@ class CliOptions(BaseModel):
     input_path_prefix: str | None = None
     extract_pages_str: str | None = None
     skip_pages_str: str | None = None
+    skip_early_flag: bool = False
+    metrics_flag: bool = False
+    metrics_log: str | None = None
     ocrlib: str = "ocrmypdf"
+    ocr_jobs: int = 1
+    classify_first: int | None = None
+    classify_spaced: int | None = None
+    selective_ocr_flag: bool = False
+    no_cache_flag: bool = False
+    cache_size_mb: int = DEFAULT_CACHE_SIZE_MB
     languages: str = "eng"
     remove_background_flag: bool = False
+    crop_tool: str = "pillow"
     dpi: int = 300
     layout: str | None = None
     output_pages: str | None = None
     pre_rotate: int | None = None
     get_doi_flag: bool = False
+    doi_first: int = 1
+    doi_last: int = 0
     export_images_flag: bool = False
     export_format: str = "png"
     export_texts_flag: bool = False
+    text_jsonl_flag: bool = False
+    text_structure: str | None = None
     export_thumbs_flag: bool = False
+    thumb_format: str = "jpg"
+    render_jobs: int = 1
+    unpaper_jobs: int = 1
+    unpaper_batch_flag: bool = False
+    in_memory_flag: bool = False
+    osd_dpi: int | None = None
+    osd_max_pixels: int | None = None
+    osd_min_conf: float | None = None
+    workspace_dir: str | None = None
+    workspace_quota_mb: int | None = None
+    workspace_wait: int | None = None
     debug_flag: bool = False
 
 
@@ -31,19 +59,70 @@ def show_info(input_pdf, output_dir, debug_flag: bool):
         click.echo(f"[DEBUG] {' '.join(sys.argv)}")
 
 
+def run_batch_mode(input_files, output_dir, options, batch_kwargs):
+    click.echo(f"Files  :  {len(input_files)}")
+
+    summary = run_batch(
+        input_files,
+        output_dir,
+        **batch_kwargs,
+        **options.model_dump(),
+    )
+
+    for item in summary["files"]:
+        if item["status"] != "ok":
+            click.echo(f"Failed :  {item['input']} - {item['error']}", err=True)
+
+    click.echo(
+        f"Summary:  {summary['ok']} ok, {summary['failed']} failed "
+        f"in {summary['elapsed']} s"
+    )
+
+    return summary
+
+
 @click.command()
 @click.option("--infile", "input_pdf", type=click.Path(exists=True, dir_okay=False))
+@click.option("--indir", "input_dir", type=click.Path(exists=True, file_okay=False))
+@click.option("--glob", "input_glob", default="*.pdf")
+@click.option("--filelist", "input_list", type=click.Path(exists=True, dir_okay=False))
+@click.option("--workers", "workers", default=None, type=click.IntRange(1))
+@click.option(
+    "--max-tasks-per-child", "max_tasks_per_child", default=None, type=click.IntRange(1)
+)
+@click.option("--summary", "summary_json", type=click.Path(dir_okay=False))
 @click.option(
     "--outdir", "output_dir", type=click.Path(file_okay=False, resolve_path=True)
 )
 @click.option("--relative", "input_path_prefix", type=click.Path(file_okay=False))
 @click.option("--extract", "extract_pages_str", default=None)
 @click.option("--skip-post", "skip_pages_str", default=None)
+@click.option(
+    "--skip-early",
+    "skip_early_flag",
+    is_flag=True,
+    help="Drop --skip-post pages before rasterization and OCR",
+)
 @click.option("--lang", "languages", default="eng")
 @click.option("--dpi", default=300, type=click.IntRange(72, 1200))
 @click.option(
     "--ocrlib", "ocrlib", default="ocrmypdf", type=click.Choice(["ocrmypdf", "pymupdf"])
 )
+@click.option("--ocr-jobs", "ocr_jobs", default=1, type=click.IntRange(1))
+@click.option(
+    "--ocr-selective",
+    "selective_ocr_flag",
+    is_flag=True,
+    help="OCR only pages without a text layer",
+)
+@click.option("--no-cache", "no_cache_flag", is_flag=True)
+@click.option(
+    "--cache-size",
+    "cache_size_mb",
+    default=DEFAULT_CACHE_SIZE_MB,
+    type=click.IntRange(1),
+    help="OCR cache size in MB",
+)
 @click.option(
     "--layout", "layout", default=None, type=click.Choice(["single", "double", "none"])
 )
@@ -53,19 +132,90 @@ def show_info(input_pdf, output_dir, debug_flag: bool):
 @click.option(
     "--pre-rotate", "pre_rotate", default=None, type=click.Choice([0, 90, 180, 270])
 )
+@click.option(
+    "--classify-first",
+    "classify_first",
+    default=None,
+    type=click.IntRange(1),
+    help="Detect scans from the first N pages only",
+)
+@click.option(
+    "--classify-spaced",
+    "classify_spaced",
+    default=None,
+    type=click.IntRange(1),
+    help="Detect scans from M evenly spaced pages only",
+)
 @click.option("--remove-bg", "remove_background_flag", is_flag=True)
+@click.option(
+    "--crop-tool", "crop_tool", default="pillow", type=click.Choice(["pillow", "numpy"])
+)
 @click.option("--get-doi", "get_doi_flag", is_flag=True)
+@click.option("--doi-first", "doi_first", default=1, type=click.IntRange(0))
+@click.option("--doi-last", "doi_last", default=0, type=click.IntRange(0))
 @click.option("--get-img", "export_images_flag", is_flag=True)
 @click.option("--get-text", "export_texts_flag", is_flag=True)
+@click.option("--text-jsonl", "text_jsonl_flag", is_flag=True)
+@click.option(
+    "--text-structure",
+    "text_structure",
+    default=None,
+    type=click.Choice(TEXT_STRUCTURES),
+)
 @click.option("--get-thumb", "export_thumbs_flag", is_flag=True)
+@click.option(
+    "--thumb-format", "thumb_format", default="jpg", type=click.Choice(THUMB_FORMATS)
+)
 @click.option(
     "--get-format", "export_format", default="png", type=click.Choice(["png"])
 )
+@click.option("--render-jobs", "render_jobs", default=1, type=click.IntRange(1))
+@click.option("--unpaper-jobs", "unpaper_jobs", default=1, type=click.IntRange(1))
+@click.option("--unpaper-batch", "unpaper_batch_flag", is_flag=True)
+@click.option("--in-memory", "in_memory_flag", is_flag=True)
+@click.option("--osd-dpi", "osd_dpi", default=None, type=click.IntRange(36, 1200))
+@click.option(
+    "--osd-max-pixels", "osd_max_pixels", default=None, type=click.IntRange(1)
+)
+@click.option("--osd-min-conf", "osd_min_conf", default=None, type=click.FloatRange(0))
+@click.option("--metrics", "metrics_flag", is_flag=True)
+@click.option("--metrics-log", "metrics_log", type=click.Path(dir_okay=False))
+@click.option("--workspace", "workspace_dir", type=click.Path(file_okay=False))
+@click.option(
+    "--workspace-quota",
+    "workspace_quota_mb",
+    default=None,
+    type=click.IntRange(1),
+    help="Disk quota in MB shared by the job workspaces (page images, working "
+    "PDFs) - excludes the OCR cache and OCRmyPDF temp files",
+)
+@click.option(
+    "--workspace-wait",
+    "workspace_wait",
+    default=None,
+    type=click.IntRange(0),
+    help="Seconds a job waits for room within --workspace-quota",
+)
 @click.option("--debug", "debug_flag", is_flag=True)
-def main(input_pdf, output_dir, **kwargs):
+def main(
+    input_pdf,
+    output_dir,
+    input_dir,
+    input_glob,
+    input_list,
+    workers,
+    max_tasks_per_child,
+    summary_json,
+    **kwargs,
+):
     """Main entrypoint for pdf-wtf CLI -
     *unpaper* required for these options:
-    layout output-pages pre-rotate"""
+    layout output-pages pre-rotate
+
+    Batch mode: --indir (with --glob) and/or --filelist"""
+
+    if not input_pdf and not input_dir and not input_list:
+        raise click.UsageError("Use --infile, --indir or --filelist")
 
     # Normalize output directory
     output_dir = get_output_dir(output_dir=output_dir)
@@ -73,6 +223,36 @@ def main(input_pdf, output_dir, **kwargs):
     # Collect CLI options into Pydantic model
     options = CliOptions(**kwargs)
 
+    if input_dir or input_list:
+        show_info(input_dir or input_list, output_dir, options.debug_flag)
+
+        input_files = collect_input_files(
+            input_dir=input_dir, pattern=input_glob, file_list=input_list
+        )
+        if input_pdf:
+            input_files = sorted(set(input_files) | {Path(input_pdf).resolve()})
+
+        # Keep the input tree layout in batch mode unless --relative is given
+        if not options.input_path_prefix:
+            options.input_path_prefix = batch_path_prefix(input_files, input_dir)
+
+        try:
+            summary = run_batch_mode(
+                input_files,
+                output_dir,
+                options,
+                {
+                    "workers": workers,
+                    "max_tasks_per_child": max_tasks_per_child,
+                    "summary_json": summary_json,
+                },
+            )
+        except ValueError as e:
+            raise click.UsageError(str(e))
+
+        click.echo("Done!")
+        sys.exit(1 if summary["failed"] else 0)
+
     # Show info
     show_info(input_pdf, output_dir, options.debug_flag)
 
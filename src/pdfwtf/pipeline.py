@@ -1,33 +1,52 @@
-import hashlib
+import json
 import os
+import re
 import shutil
+import subprocess
+import sys
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from itertools import repeat
 from pathlib import Path
 import fitz  # PyMuPDF
 from PIL import Image
-from pdfwtf.unpaper_run import get_unpaper_args, get_unpaper_version, run_unpaper_simple
+from pdfwtf.unpaper_run import (
+    get_sheet_runs,
+    get_unpaper_args,
+    get_unpaper_version,
+    run_unpaper_batch,
+    run_unpaper_simple,
+    unpaper_supports,
+)
 
-from .utils.analyze import is_scanned_or_hybrid
+from .utils.analyze import PAGE_IMAGE, classify_pages, is_scanned_or_hybrid
+from .utils.cache import DEFAULT_CACHE_SIZE_MB, OcrCache
+from .utils.context import DocumentContext, fitz_document
+from .utils.metrics import StageMetrics
+from .utils.plan import PagePlan
+from .utils.workspace import WorkspaceManager, estimate_scan_mb
 
 from .utils.common import (
+    chunk_list,
     clear_dir,
     count_pdf_pages,
     extract_pages,
     get_output_dir_final,
     get_temp_dir,
+    tool_env,
+    correct_image_orientation,
     correct_images_orientation,
     crop_dark_background,
+    crop_dark_background_image,
     images_to_pdf,
     parse_page_ranges,
-    export_thumbnails,
+    replace_pages,
+    doi_page_window,
     get_doi,
     write_json,
 )
 
-if os.environ.get("PDFWTF_TEMP_DIR"):
-    os.environ["TMPDIR"] = os.environ.get("PDFWTF_TEMP_DIR")
-    os.environ["TEMP"] = os.environ.get("PDFWTF_TEMP_DIR")
-
 import ocrmypdf
 from ocrmypdf.api import configure_logging, Verbosity
 
@@ -44,10 +63,14 @@ def run_ocr(
     output_pages=None,
     rotated=False,
     unpaper_ok=False,
+    ocr_jobs=1,
     debug_flag=False,
+    env=None,
 ):
     if ocrlib == "pymupdf":
-        run_pdfocr(img_dir, output_pdf, language=lang, debug_flag=debug_flag)
+        run_pdfocr(
+            img_dir, output_pdf, language=lang, jobs=ocr_jobs, debug_flag=debug_flag
+        )
 
     elif ocrlib == "ocrmypdf":
         run_ocrmypdf(
@@ -59,24 +82,46 @@ def run_ocr(
             rotated=rotated,
             unpaper_ok=unpaper_ok,
             debug_flag=debug_flag,
+            env=env,
         )
     else:
         shutil.copy2(input_pdf, output_pdf)
 
 
-def run_pdfocr(img_dir, output_pdf, language="eng", dpi=300, debug_flag=False):
-    """Run OCR with Tesseract via PyMuPDF."""
+def _pdfocr_page(img_file: Path, language="eng") -> bytes:
+    """OCR one page image into a one-page PDF."""
+    pix = fitz.Pixmap(str(img_file))
+    return pix.pdfocr_tobytes(language=language)
+
+
+def run_pdfocr(img_dir, output_pdf, language="eng", dpi=300, jobs=1, debug_flag=False):
+    """
+    Run OCR with Tesseract via PyMuPDF.
+
+    :param jobs: number of worker processes - pages are OCR'd concurrently
+        and merged in page order
+    """
 
     img_dir = Path(img_dir)
+    img_files = sorted(img_dir.glob("*.png"))
     final_doc = fitz.open()
 
-    for img_file in sorted(img_dir.glob("*.png")):
-        pix = fitz.Pixmap(str(img_file))
-        ocr_bytes = pix.pdfocr_tobytes(language=language)
-        tmp_doc = fitz.open(stream=ocr_bytes, filetype="pdf")
-        final_doc.insert_pdf(tmp_doc)
-        tmp_doc.close()
-        pix = None
+    jobs = max(1, min(jobs or 1, len(img_files)))
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+    try:
+        if executor:
+            pages = executor.map(_pdfocr_page, img_files, repeat(language))
+        else:
+            pages = (_pdfocr_page(img_file, language) for img_file in img_files)
+
+        # map() yields in submission order - pages are merged as they come
+        for ocr_bytes in pages:
+            with fitz.open(stream=ocr_bytes, filetype="pdf") as tmp_doc:
+                final_doc.insert_pdf(tmp_doc)
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
 
     final_doc.save(output_pdf, clean=True, deflate=True, use_objstms=True)
     final_doc.close()
@@ -92,8 +137,15 @@ def run_ocrmypdf(
     clean_flag=True,
     unpaper_ok=False,
     debug_flag=False,
+    env=None,
 ):
-    """Run OCR with Tesseract via OCRmyPDF."""
+    """
+    Run OCR with Tesseract via OCRmyPDF.
+
+    :param env: run OCRmyPDF as a subprocess with this environment (see
+        tool_env) - its temp files go to the job's workspace. None runs it
+        in this process with the process-wide temp dir.
+    """
 
     keep_temporary_files = bool(debug_flag)
 
@@ -114,9 +166,7 @@ def run_ocrmypdf(
 
     rotate_pages = not rotated
 
-    ocrmypdf.ocr(
-        input_pdf,
-        output_pdf,
+    options = dict(
         language=lang,
         force_ocr=True,
         unpaper_args=unpaper_args,
@@ -132,8 +182,59 @@ def run_ocrmypdf(
         keep_temporary_files=keep_temporary_files,
     )
 
+    if env is None:
+        ocrmypdf.ocr(input_pdf, output_pdf, **options)
+        return
 
-def export_images(pdf_path: Path, out_dir: Path, dpi=300, fext="png"):
+    # OCRmyPDF takes its work folder from TMPDIR only - a subprocess gets
+    # the job's own without touching this process
+    cmd = [sys.executable, "-m", "ocrmypdf", "--quiet"]
+    cmd += ocrmypdf_cmdline(**options)
+    cmd += [str(input_pdf), str(output_pdf)]
+    subprocess.run(cmd, env=env, check=True)
+
+
+def ocrmypdf_cmdline(**options) -> list:
+    """OCRmyPDF API keyword arguments as command line arguments."""
+    cmdline = []
+    for name, value in options.items():
+        if value is None:
+            continue
+        if name == "progress_bar":
+            if not value:
+                cmdline.append("--no-progress-bar")
+            continue
+
+        flag = "--" + name.replace("_", "-")
+        if isinstance(value, bool):
+            if value:
+                cmdline.append(flag)
+            continue
+        cmdline += [flag, str(value)]
+
+    return cmdline
+
+
+def _export_images_chunk(
+    pdf_path: Path, out_dir: Path, page_numbers, dpi, fext, ctx=None
+):
+    """Render the given 1-based pages - every worker opens its own document."""
+    with fitz_document(pdf_path, ctx) as doc:
+        for i in page_numbers:
+            pix = doc[i - 1].get_pixmap(dpi=dpi)
+            out_path = out_dir / f"page_{str(i).zfill(3)}.{fext}"
+            pix.save(str(out_path))  # PyMuPDF expects a str path
+            pix = None
+
+
+def export_images(pdf_path: Path, out_dir: Path, dpi=300, fext="png", jobs=1, ctx=None):
+    """
+    Render PDF pages to page_NNN.<fext> images.
+
+    :param jobs: number of worker processes, pages are split into
+        contiguous chunks - one per worker
+    :param ctx: DocumentContext - used by the serial path only
+    """
 
     if out_dir.is_dir():
         clear_dir(out_dir)
@@ -143,17 +244,217 @@ def export_images(pdf_path: Path, out_dir: Path, dpi=300, fext="png"):
     if not pdf_path.exists():
         return
 
+    page_numbers = list(range(1, count_pdf_pages(pdf_path, ctx=ctx) + 1))
+    chunks = chunk_list(page_numbers, jobs or 1)
+
+    if len(chunks) <= 1:
+        _export_images_chunk(pdf_path, out_dir, page_numbers, dpi, fext, ctx=ctx)
+        return
+
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        futures = [
+            executor.submit(_export_images_chunk, pdf_path, out_dir, chunk, dpi, fext)
+            for chunk in chunks
+        ]
+        for future in futures:
+            future.result()
+
+
+def render_page_image(page, dpi=300) -> Image.Image:
+    """Render a fitz page straight into a PIL image - no encoding involved."""
+    pix = page.get_pixmap(dpi=dpi)  # RGB, no alpha
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+
+THUMB_FORMATS = ("jpg", "webp")
+
+
+def export_pdf_thumbnails(
+    pdf_path: Path,
+    thumbs_dir: Path,
+    thumb_size=(400, 400),
+    fext="jpg",
+    quality=75,
+    ctx=None,
+):
+    """
+    Render page_NNN.<fext> thumbnails straight from the PDF.
+
+    Every page is rendered at the scale that fits it into thumb_size -
+    no full resolution image is rendered or encoded on the way.
+
+    :param thumb_size: max (width, height) for thumbnails
+    :param fext: "jpg" or "webp"
+    :param quality: JPEG / WebP quality
+    """
+
+    if thumbs_dir.is_dir():
+        clear_dir(thumbs_dir)
+
+    thumbs_dir.mkdir(parents=True, exist_ok=True)
+
+    if not pdf_path.exists():
+        return
+
+    if fext == "webp":
+        save_kwargs = {"quality": quality, "method": 4}
+    else:
+        save_kwargs = {"quality": quality, "optimize": True}
+
+    with fitz_document(pdf_path, ctx) as doc:
+        for i, page in enumerate(doc, 1):
+            rect = page.rect
+            zoom = min(thumb_size[0] / rect.width, thumb_size[1] / rect.height)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+
+            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            out_path = thumbs_dir / f"page_{str(i).zfill(3)}.{fext}"
+            img.save(out_path, **save_kwargs)
+
+
+def _prepare_page_images_chunk(
+    pdf_path: Path,
+    out_dir: Path,
+    page_numbers,
+    dpi,
+    fext,
+    correct_orientation,
+    remove_background,
+    osd_options,
+    crop_tool,
+) -> dict:
+    info = {"rotated": {}, "cropped": []}
+
     doc = fitz.open(pdf_path)
     try:
-        for i, page in enumerate(doc, start=1):
-            pix = page.get_pixmap(dpi=dpi)
-            out_path = out_dir / f"page_{str(i).zfill(3)}.{fext}"
-            pix.save(str(out_path))  # PyMuPDF expects a str path
+        for i in page_numbers:
+            img = render_page_image(doc[i - 1], dpi=dpi)
+            name = f"page_{str(i).zfill(3)}.{fext}"
+
+            if correct_orientation:
+                img, rotate_angle = correct_image_orientation(
+                    img, src_dpi=dpi, **osd_options
+                )
+                if rotate_angle != 0:
+                    info["rotated"][name] = rotate_angle
+
+            if remove_background:
+                img, was_cropped = crop_dark_background_image(img, tool=crop_tool)
+                if was_cropped:
+                    info["cropped"].append(name)
+
+            img.save(out_dir / name, dpi=(dpi, dpi))
+            img.close()
     finally:
         doc.close()
 
+    return info
+
 
-def export_text(pdf_path: Path, out_dir: Path, level="text") -> dict:
+def prepare_page_images(
+    pdf_path: Path,
+    out_dir: Path,
+    dpi=300,
+    fext="png",
+    correct_orientation=True,
+    remove_background=False,
+    jobs=1,
+    osd_options=None,
+    crop_tool="pillow",
+) -> dict:
+    """
+    In-memory variant of export_images + correct_images_orientation +
+    crop_dark_background: every page is rendered, rotated and cropped
+    as a PIL image and encoded only once.
+
+    :param fext: output format - "pnm" avoids zlib when unpaper is next
+    :param jobs: number of worker processes
+    :param osd_options: passed to detect_rotation (osd_dpi, max_pixels, ...)
+    :param crop_tool: "pillow" or "numpy"
+    :return: {"rotated": {name: angle}, "cropped": [name, ...]}
+    """
+
+    if out_dir.is_dir():
+        clear_dir(out_dir)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    info = {"rotated": {}, "cropped": []}
+
+    if not pdf_path.exists():
+        return info
+
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+
+    chunks = chunk_list(list(range(1, page_count + 1)), jobs or 1)
+    args = (
+        dpi,
+        fext,
+        correct_orientation,
+        remove_background,
+        osd_options or {},
+        crop_tool,
+    )
+
+    if len(chunks) <= 1:
+        results = [
+            _prepare_page_images_chunk(pdf_path, out_dir, chunk, *args)
+            for chunk in chunks
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            futures = [
+                executor.submit(
+                    _prepare_page_images_chunk, pdf_path, out_dir, chunk, *args
+                )
+                for chunk in chunks
+            ]
+            results = [future.result() for future in futures]
+
+    for result in results:
+        info["rotated"].update(result["rotated"])
+        info["cropped"].extend(result["cropped"])
+
+    return info
+
+
+TEXT_STRUCTURES = ("dict", "blocks", "words")
+
+
+def _page_structure(page, structure: str):
+    if structure == "dict":
+        # Leave out the embedded image bytes - text blocks only
+        flags = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+        return page.get_text("dict", flags=flags)
+
+    return page.get_text(structure)
+
+
+def export_texts(
+    pdf_path: Path,
+    out_dir: Path,
+    summary_path: Path = None,
+    jsonl_path: Path = None,
+    structure: str = None,
+    keep_pages=None,
+    level="text",
+    ctx=None,
+) -> dict:
+    """
+    Export page texts in a single pass over the pages.
+
+    Every page is extracted once and written straight to all outputs, so
+    memory does not grow with the document.
+
+    :param out_dir: page_NNN.txt files
+    :param summary_path: all pages in one file with page separators
+    :param jsonl_path: one {"page", "text", "words", "chars"} line per page
+    :param structure: "dict", "blocks" or "words" - also write
+        page_NNN.<structure>.json files to out_dir
+    :param keep_pages: 1-based pages whose text is returned, None for all
+    :return: {page number: text} for the kept pages
+    """
 
     if out_dir.is_dir():
         clear_dir(out_dir)
@@ -163,26 +464,259 @@ def export_text(pdf_path: Path, out_dir: Path, level="text") -> dict:
     if not pdf_path.exists():
         return {}
 
-    doc = fitz.open(pdf_path)
+    if structure and structure not in TEXT_STRUCTURES:
+        raise ValueError(f"Unknown text structure: {structure}")
+
     text_pages = {}
 
-    try:
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text(level)
-            text_pages[page_num + 1] = text
+    with ExitStack() as stack:
+        doc = stack.enter_context(fitz_document(pdf_path, ctx))
+        total_pages = len(doc)
+
+        summary = None
+        if summary_path:
+            summary = stack.enter_context(summary_path.open("w", encoding="utf-8"))
 
+        jsonl = None
+        if jsonl_path:
+            jsonl = stack.enter_context(jsonl_path.open("w", encoding="utf-8"))
+
+        for page_num in range(total_pages):
             cnt = page_num + 1
 
+            if ctx is not None:
+                text = ctx.page_text(pdf_path, page_num, level, store=False)
+            else:
+                text = doc[page_num].get_text(level)
+
+            if keep_pages is None or cnt in keep_pages:
+                text_pages[cnt] = text
+
             out_path = out_dir / f"page_{str(cnt).zfill(3)}.txt"
             out_path.write_text(text, encoding="utf-8")
 
-    finally:
-        doc.close()
+            if summary:
+                summary.write(f"--- Page {cnt} of {total_pages} ---\n")
+                summary.write(text)
+                summary.write("\n\n")
+
+            if jsonl:
+                record = {
+                    "page": cnt,
+                    "text": text,
+                    "words": len(text.split()),
+                    "chars": len(text),
+                }
+                jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+            if structure:
+                struct_path = out_dir / f"page_{str(cnt).zfill(3)}.{structure}.json"
+                with struct_path.open("w", encoding="utf-8") as f:
+                    json.dump(_page_structure(doc[page_num], structure), f)
 
     return text_pages
 
 
+def export_text(pdf_path: Path, out_dir: Path, level="text", ctx=None) -> dict:
+    return export_texts(pdf_path, out_dir, level=level, ctx=ctx)
+
+
+def _unpaper_page(
+    infile: Path, pnm_subdir: Path, tmpdir: Path, dpi, args, output_pages, env=None
+):
+    if output_pages:
+        temp_outfile = pnm_subdir / f"{infile.stem}_%03d.pnm"
+    else:
+        temp_outfile = pnm_subdir / f"{infile.stem}.pnm"
+
+    run_unpaper_simple(
+        input_file=infile,
+        output_file=temp_outfile,
+        dpi=dpi,
+        mode_args=args,
+        tmpdir=tmpdir,
+        env=env,
+    )
+
+
+def _unpaper_batch_outputs(
+    input_pattern,
+    sheets,
+    pnm_subdir: Path,
+    tmpdir: Path,
+    dpi,
+    args,
+    output_pages,
+    env=None,
+) -> list:
+    """Batch run - returns the files whose sheet has no complete output."""
+    per_sheet = 2 if output_pages == "2" else 1
+    chunk_dir = Path(tempfile.mkdtemp(prefix="_unpaper_", dir=tmpdir))
+
+    def outputs(k):
+        first = k * per_sheet + 1
+        return [chunk_dir / f"out_{n:04d}.pnm" for n in range(first, first + per_sheet)]
+
+    retry = []
+    try:
+        result = run_unpaper_batch(
+            input_pattern,
+            str(chunk_dir / "out_%04d.pnm"),
+            tmpdir,
+            start_sheet=sheets[0][0],
+            end_sheet=sheets[-1][0],
+            dpi=dpi,
+            mode_args=args,
+            env=env,
+        )
+
+        # unpaper writes the sheets in order - after a failure only output
+        # beyond a sheet proves that sheet complete
+        numbers = [int(p.stem[4:]) for p in chunk_dir.glob("out_*.pnm")]
+        last_output = max(numbers, default=0)
+
+        for k, (_, infile) in enumerate(sheets):
+            done = all(p.exists() for p in outputs(k))
+            if done and result.returncode != 0:
+                done = last_output > (k + 1) * per_sheet
+            if not done:
+                retry.append(infile)
+                continue
+
+            for j, path in enumerate(outputs(k), 1):
+                name = f"{infile.stem}_{j:03d}" if output_pages else infile.stem
+                os.replace(path, pnm_subdir / f"{name}.pnm")
+    finally:
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+
+    return retry
+
+
+def _unpaper_chunk(
+    input_pattern,
+    sheets,
+    pnm_subdir: Path,
+    tmpdir: Path,
+    dpi,
+    args,
+    output_pages,
+    env=None,
+) -> list:
+    """
+    Run one unpaper process over consecutive sheets and rename its outputs
+    to the names _unpaper_page would write. Sheets without complete output
+    are retried one by one, so a failure is pinned to its page.
+
+    :param input_pattern: None for files without a sheet number -
+        these run one by one
+    :param sheets: [(sheet number, file), ...]
+    :return: list of failures - {"file": name, "error": message}
+    """
+    retry = [infile for _, infile in sheets]
+    if input_pattern is not None:
+        try:
+            retry = _unpaper_batch_outputs(
+                input_pattern, sheets, pnm_subdir, tmpdir, dpi, args, output_pages, env
+            )
+        except Exception as e:
+            print(f"[WARNING] unpaper batch failed, running page by page - {e}")
+
+    failures = []
+    for infile in retry:
+        try:
+            _unpaper_page(infile, pnm_subdir, tmpdir, dpi, args, output_pages, env)
+        except Exception as e:
+            failures.append({"file": infile.name, "error": str(e)})
+
+    return failures
+
+
+def run_unpaper_pages(
+    files_to_process,
+    pnm_subdir: Path,
+    tmpdir: Path,
+    dpi=300,
+    unpaper_args=None,
+    output_pages=None,
+    jobs=1,
+    batch=False,
+    env=None,
+) -> list:
+    """
+    Run unpaper over page images using a bounded thread pool -
+    unpaper runs as a subprocess so threads are enough.
+
+    :param batch: one unpaper process per chunk of consecutive pages
+        instead of one per page - the pages are split into jobs chunks
+    :param env: environment of the unpaper processes - see tool_env
+    :return: list of failures - {"file": name, "error": message}
+    """
+    failures = []
+
+    if batch:
+        pnm_subdir.mkdir(parents=True, exist_ok=True)
+        chunks = []
+        for pattern, sheets in get_sheet_runs(files_to_process):
+            for chunk in chunk_list(sheets, jobs or 1):
+                chunks.append((pattern, chunk))
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs or 1)) as executor:
+            futures = [
+                executor.submit(
+                    _unpaper_chunk,
+                    pattern,
+                    chunk,
+                    pnm_subdir,
+                    tmpdir,
+                    dpi,
+                    unpaper_args,
+                    output_pages,
+                    env,
+                )
+                for pattern, chunk in chunks
+            ]
+            for future in futures:
+                failures.extend(future.result())
+
+        return failures
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs or 1)) as executor:
+        futures = {
+            executor.submit(
+                _unpaper_page,
+                infile,
+                pnm_subdir,
+                tmpdir,
+                dpi,
+                unpaper_args,
+                output_pages,
+                env,
+            ): infile
+            for infile in files_to_process
+        }
+        for future, infile in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                failures.append({"file": infile.name, "error": str(e)})
+
+    return failures
+
+
+def _get_osd_options(osd_dpi=None, osd_max_pixels=None, osd_min_conf=None) -> dict:
+    osd_options = {"osd_dpi": osd_dpi, "max_pixels": osd_max_pixels}
+    if osd_min_conf is not None:
+        osd_options["min_confidence"] = osd_min_conf
+
+    return osd_options
+
+
+WORKSPACE_SUBDIR = "jobs"
+
+# Metadata of the scanned pipeline stored with an OCR cache entry
+CACHED_METADATA = ("rotated_pages", "unpaper_failures")
+
+
 def _prepare_temp_and_paths(input_pdf, debug_flag):
     temp_dir = get_temp_dir(clean=False, debug=debug_flag)
     input_pdf = Path(input_pdf).resolve(strict=True)
@@ -191,14 +725,13 @@ def _prepare_temp_and_paths(input_pdf, debug_flag):
 
 
 def _build_output_paths(
-    input_pdf: Path, output_dir, input_path_prefix, img_dir, thumb_dir
+    input_pdf: Path, output_dir, input_path_prefix, img_dir, thumb_dir, workspace
 ):
     output_dir = get_output_dir_final(output_dir, input_pdf, input_path_prefix)
     output_pdf = output_dir / input_pdf.name
 
-    base_hash = hashlib.md5(str(input_pdf).encode("utf-8")).hexdigest()[:8]
-    tmp_pdf = Path(tempfile.gettempdir()) / f"{base_hash}_{input_pdf.stem}.tmp.pdf"
-    scan_pdf = Path(tempfile.gettempdir()) / f"{base_hash}_{input_pdf.stem}.scan.pdf"
+    tmp_pdf = workspace / f"{input_pdf.stem}.tmp.pdf"
+    scan_pdf = workspace / f"{input_pdf.stem}.scan.pdf"
 
     images_dir = output_dir / f"{img_dir}_{input_pdf.stem}"
     thumbs_dir = output_dir / f"{thumb_dir}_{input_pdf.stem}"
@@ -206,14 +739,24 @@ def _build_output_paths(
     return output_dir, output_pdf, tmp_pdf, scan_pdf, images_dir, thumbs_dir
 
 
-def _extract_or_copy_pages(input_pdf, tmp_pdf, extract_pages_str, total_pages_in):
-    if extract_pages_str:
-        output_orig = tmp_pdf.parent / f"{input_pdf.stem}.orig.pdf"
-        shutil.copy2(input_pdf, output_orig)
-        pages_to_keep = parse_page_ranges(extract_pages_str, total_pages=total_pages_in)
-        extract_pages(input_pdf, tmp_pdf, pages_to_keep=pages_to_keep)
-    else:
+def _extract_or_copy_pages(input_pdf, tmp_pdf, plan: PagePlan, ctx=None):
+    if plan.is_full:
         shutil.copy2(input_pdf, tmp_pdf)
+    else:
+        extract_pages(input_pdf, tmp_pdf, pages_to_keep=plan.pages, ctx=ctx)
+
+
+PAT_PAGE_NUMBER = re.compile(r"(\d+)$")
+
+
+def _rotations_by_page(rotations: dict, page_map: list = None) -> dict:
+    """{page image file name: angle} -> {page number: angle}."""
+    by_page = {}
+    for name, angle in rotations.items():
+        work_page = int(PAT_PAGE_NUMBER.search(Path(name).stem).group(1))
+        by_page[page_map[work_page - 1] if page_map else work_page] = angle
+
+    return dict(sorted(by_page.items()))
 
 
 def _process_scanned(
@@ -228,34 +771,39 @@ def _process_scanned(
     scan_dir_name,
     img_dir,
     export_format="png",
+    render_jobs=1,
+    unpaper_jobs=1,
+    unpaper_batch=False,
+    in_memory_flag=False,
+    osd_options=None,
+    crop_tool="pillow",
+    metadata=None,
+    ctx=None,
+    metrics=None,
+    workspace=None,
+    env=None,
+    page_map=None,
 ):
-    # Copy working PDF
-    shutil.copy2(tmp_pdf, scan_pdf)
-
-    temp_subdir = Path(tempfile.mkdtemp())
-    scans_dir = temp_subdir / scan_dir_name
-    export_images(tmp_pdf, scans_dir, dpi=dpi, fext=export_format)
-
-    pnm_subdir = temp_subdir / "_pnm"
-    pnm_subdir.mkdir(parents=True, exist_ok=True)
+    """
+    :param page_map: input page number of each working PDF page - keys of
+        metadata["rotated_pages"], the working page number if None
+    """
+    if metadata is None:
+        metadata = {}
 
-    files_to_process = sorted(scans_dir.glob("*.png"))
+    if metrics is None:
+        metrics = StageMetrics()
 
-    rotated = bool(pre_rotate) or correct_images_orientation(files_to_process)
+    if osd_options is None:
+        osd_options = {}
 
-    background_removed = False
-    if remove_background_flag:
-        background_removed = crop_dark_background(files_to_process, tool="pillow")
+    # Copy working PDF
+    shutil.copy2(tmp_pdf, scan_pdf)
 
     unpaper_ok, unpaper_msg = get_unpaper_version()
     if not unpaper_ok:
         print("[WARNING] unpaper not running")
 
-    if debug_flag:
-        print(f"[DEBUG] unpaper version: {unpaper_msg}")
-        print(f"[DEBUG] Rotated pages: {rotated}")
-        print(f"[DEBUG] Background removed from: {background_removed}")
-
     unpaper_args = get_unpaper_args(
         layout=layout,
         output_pages=output_pages,
@@ -264,39 +812,89 @@ def _process_scanned(
         unpaper_ok=unpaper_ok,
     )
 
-    # Run unpaper over each image
-    if unpaper_ok and unpaper_args:
-        for infile in files_to_process:
-            try:
-                if output_pages:
-                    temp_outfile = pnm_subdir / f"{infile.stem}_%03d.pnm"
-                else:
-                    temp_outfile = pnm_subdir / f"{infile.stem}.pnm"
-
-                run_unpaper_simple(
-                    input_file=infile,
-                    output_file=temp_outfile,
-                    dpi=dpi,
-                    mode_args=unpaper_args,
-                    tmpdir=temp_subdir,
+    temp_subdir = Path(tempfile.mkdtemp(dir=workspace))
+    scans_dir = temp_subdir / scan_dir_name
+
+    pnm_subdir = temp_subdir / "_pnm"
+    pnm_subdir.mkdir(parents=True, exist_ok=True)
+
+    if in_memory_flag:
+        # Unpaper reads PNM natively - skip the PNG encode for its input
+        scan_fext = "pnm" if unpaper_ok and unpaper_args else export_format
+        # Orientation and cropping run inside the render workers
+        with metrics.stage("rasterize", scans_dir):
+            page_info = prepare_page_images(
+                tmp_pdf,
+                scans_dir,
+                dpi=dpi,
+                fext=scan_fext,
+                correct_orientation=not pre_rotate,
+                remove_background=remove_background_flag,
+                jobs=render_jobs,
+                osd_options=osd_options,
+                crop_tool=crop_tool,
+            )
+        files_to_process = sorted(scans_dir.glob(f"*.{scan_fext}"))
+        rotations = page_info["rotated"]
+        background_removed = len(page_info["cropped"])
+    else:
+        with metrics.stage("rasterize", scans_dir):
+            export_images(
+                tmp_pdf,
+                scans_dir,
+                dpi=dpi,
+                fext=export_format,
+                jobs=render_jobs,
+                ctx=ctx,
+            )
+        files_to_process = sorted(scans_dir.glob("*.png"))
+
+        rotations = {}
+        if not pre_rotate:
+            with metrics.stage("orientation"):
+                rotations = correct_images_orientation(
+                    files_to_process, src_dpi=dpi, **osd_options
                 )
 
-            except Exception as e:
-                print(f"Unpaper failed for {infile}: {e}")
-                if debug_flag:
-                    cmd_debug = [
-                        "unpaper",
-                        "-v",
-                        "--dpi",
-                        str(round(dpi, 6)),
-                    ] + unpaper_args
-                    cmd_debug.extend(
-                        [
-                            str(infile.resolve(strict=True)),
-                            str(temp_outfile.resolve(strict=True)),
-                        ]
-                    )
-                    print(" ".join(cmd_debug))
+        background_removed = False
+        if remove_background_flag:
+            with metrics.stage("crop"):
+                background_removed = crop_dark_background(
+                    files_to_process, tool=crop_tool
+                )
+
+    rotated = bool(pre_rotate) or bool(rotations)
+    if rotations:
+        metadata["rotated_pages"] = _rotations_by_page(rotations, page_map)
+
+    if debug_flag:
+        print(f"[DEBUG] unpaper version: {unpaper_msg}")
+        print(f"[DEBUG] Rotated pages: {rotations or rotated}")
+        print(f"[DEBUG] Background removed from: {background_removed}")
+
+    if unpaper_batch and not unpaper_supports(
+        "--start-sheet", "--end-sheet", "--start-output"
+    ):
+        print("[WARNING] unpaper cannot batch pages - running page by page")
+        unpaper_batch = False
+
+    # Run unpaper over each image
+    if unpaper_ok and unpaper_args:
+        with metrics.stage("unpaper", pnm_subdir):
+            unpaper_failures = run_unpaper_pages(
+                files_to_process,
+                pnm_subdir,
+                temp_subdir,
+                dpi=dpi,
+                unpaper_args=unpaper_args,
+                output_pages=output_pages,
+                jobs=unpaper_jobs,
+                batch=unpaper_batch,
+                env=env,
+            )
+        if unpaper_failures:
+            metadata["unpaper_failures"] = unpaper_failures
+            print(f"[WARNING] unpaper failed for {len(unpaper_failures)} page(s)")
 
     # Convert PNM -> PNG and collect
     has_images = False
@@ -316,17 +914,35 @@ def _process_scanned(
                 has_images = True
 
     if has_images:
-        images_to_pdf(images_dir, tmp_pdf, dpi=dpi, fext="png")
+        if ctx is not None:
+            ctx.invalidate(tmp_pdf)
+        with metrics.stage("assemble", tmp_pdf):
+            images_to_pdf(images_dir, tmp_pdf, dpi=dpi, fext="png")
     else:
         images_dir = img_dir
         try:
-            shutil.copytree(scans_dir, images_dir, dirs_exist_ok=True)
+            _copy_scans(scans_dir, Path(images_dir), export_format, dpi)
         except Exception as err:
             print(f"[ERROR] writing images to {images_dir} - {err}")
 
     return unpaper_ok, tmp_pdf, images_dir
 
 
+def _copy_scans(scans_dir: Path, images_dir: Path, fext: str, dpi: int):
+    """
+    Copy the page scans to images_dir - PNM scans (rendered for unpaper
+    with --in-memory) are re-encoded to fext when unpaper gave no output.
+    """
+    images_dir.mkdir(parents=True, exist_ok=True)
+
+    for src in sorted(scans_dir.iterdir()):
+        if src.suffix.lower() == ".pnm" and fext != "pnm":
+            with Image.open(src) as im:
+                im.save(images_dir / f"{src.stem}.{fext}", dpi=(dpi, dpi))
+        elif src.is_file():
+            shutil.copy2(src, images_dir / src.name)
+
+
 def process_pdf(
     input_pdf,
     output_dir,
@@ -341,16 +957,51 @@ def process_pdf(
     output_pages=None,
     pre_rotate=None,
     get_doi_flag=False,
+    doi_first=1,
+    doi_last=0,
     export_format="png",
     export_images_flag=False,
     export_texts_flag=False,
     export_thumbs_flag=False,
+    thumb_format="jpg",
+    render_jobs=1,
+    unpaper_jobs=1,
+    unpaper_batch_flag=False,
+    in_memory_flag=False,
+    osd_dpi=None,
+    osd_max_pixels=None,
+    osd_min_conf=None,
+    crop_tool="pillow",
+    ocr_jobs=1,
+    no_cache_flag=False,
+    cache_size_mb=DEFAULT_CACHE_SIZE_MB,
+    classify_first=None,
+    classify_spaced=None,
+    selective_ocr_flag=False,
+    skip_early_flag=False,
+    metrics_flag=False,
+    metrics_log=None,
+    text_jsonl_flag=False,
+    text_structure=None,
     scan_dir="_scans",
     txt_dir="_texts",
     img_dir="_images",
     thumb_dir="_thumbs",
+    workspace_dir=None,
+    workspace_quota_mb=None,
+    workspace_wait=None,
     debug_flag=False,
 ):
+    """
+    Process one PDF - safe to run concurrently in threads and processes.
+
+    :param workspace_dir: parent of the job's private working directory,
+        default <temp dir>/jobs - the job's files are kept with debug_flag
+    :param workspace_quota_mb: disk quota shared by all jobs using
+        workspace_dir - a scanned job waits for room before rendering
+    :param workspace_wait: give up waiting after so many seconds,
+        None waits as long as needed
+    """
     metadata = {}
 
     # Prepare temp dir and input PDF
@@ -360,99 +1011,288 @@ def process_pdf(
         print("ERROR: No input !")
         return
 
-    # Build output and working paths
-    output_dir, output_pdf, tmp_pdf, scan_pdf, images_dir, thumbs_dir = (
-        _build_output_paths(
-            input_pdf, output_dir, input_path_prefix, img_dir, thumb_dir
-        )
-    )
-
-    if debug_flag:
-        print(f"[DEBUG] Using temporary dir:  {temp_dir}")
-
-    total_pages_in = count_pdf_pages(input_pdf)
+    metrics = StageMetrics(enabled=metrics_flag, log_path=metrics_log)
 
-    # Extract or copy pages -> tmp_pdf
-    _extract_or_copy_pages(input_pdf, tmp_pdf, extract_pages_str, total_pages_in)
-
-    # Detect if scanned
-    is_scan = is_scanned_or_hybrid(input_pdf)
-    rotated = False
-
-    if debug_flag:
-        print(f"[DEBUG] PDF was scanned:  {is_scan}")
-
-    # If scanned -> process scanned pipeline
-    unpaper_ok = False
-    if is_scan:
-        unpaper_ok, tmp_pdf, images_dir = _process_scanned(
-            tmp_pdf,
-            scan_pdf,
-            dpi,
-            pre_rotate,
-            layout,
-            output_pages,
-            remove_background_flag,
-            debug_flag,
-            scan_dir,
-            images_dir,
-            export_format=export_format,
-        )
+    # Intermediates go to a private workspace, every stage shares the open
+    # documents and extracted page texts
+    workspaces = WorkspaceManager(
+        workspace_dir or temp_dir / WORKSPACE_SUBDIR,
+        quota_mb=workspace_quota_mb,
+        wait_timeout=workspace_wait,
+    )
 
-    # OCR or copy final
-    if is_scan and export_format == "png":
-        run_ocr(
-            tmp_pdf,
-            output_pdf,
-            images_dir,
-            lang=languages,
-            ocrlib=ocrlib,
-            layout=layout,
-            output_pages=output_pages,
-            rotated=rotated,
-            unpaper_ok=unpaper_ok,
-            debug_flag=debug_flag,
+    with (
+        workspaces.job(input_pdf.stem, keep=debug_flag) as workspace,
+        DocumentContext() as ctx,
+    ):
+        # Build output and working paths
+        output_dir, output_pdf, tmp_pdf, scan_pdf, images_dir, thumbs_dir = (
+            _build_output_paths(
+                input_pdf,
+                output_dir,
+                input_path_prefix,
+                img_dir,
+                thumb_dir,
+                workspace.path,
+            )
         )
-    else:
-        if tmp_pdf != output_pdf:
-            shutil.copy2(tmp_pdf, output_pdf)
 
-    if tmp_pdf.exists():
-        tmp_pdf.unlink()
-
-    # Remove pages to skip
-    if skip_pages_str:
-        pages_to_skip = parse_page_ranges(skip_pages_str, total_pages=total_pages_in)
-        extract_pages(output_pdf, output_pdf, pages_to_skip=pages_to_skip)
+        if debug_flag:
+            print(f"[DEBUG] Using workspace:  {workspace.path}")
+
+        # OCRmyPDF, Tesseract and unpaper keep their temp files in the job
+        env = tool_env(workspace.path, workspaces.root)
+
+        total_pages_in = count_pdf_pages(input_pdf, ctx=ctx)
+
+        # Every later stage works on tmp_pdf holding just the planned pages
+        plan = PagePlan.from_ranges(total_pages_in, extract_pages_str)
+        if not plan.is_full:
+            metadata["extracted_pages"] = plan.pages
+
+        # Extract or copy pages -> tmp_pdf
+        with metrics.stage("extract", tmp_pdf):
+            _extract_or_copy_pages(input_pdf, tmp_pdf, plan, ctx=ctx)
+
+        # Drop --skip-post pages before any processing
+        is_scan = None
+        skip_after = None
+        if skip_pages_str and skip_early_flag:
+            pages_per_sheet = 1
+            if output_pages == "2":
+                # unpaper splits every scanned page into two output pages
+                with metrics.stage("classify"):
+                    is_scan = is_scanned_or_hybrid(
+                        tmp_pdf, first=classify_first, spaced=classify_spaced, ctx=ctx
+                    )
+                if is_scan and get_unpaper_version()[0]:
+                    pages_per_sheet = 2
+
+            pages_to_skip = parse_page_ranges(
+                skip_pages_str, total_pages=len(plan) * pages_per_sheet
+            )
+            drop, skip_after = plan.split_skip(pages_to_skip, pages_per_sheet)
+
+            if drop and len(drop) < len(plan):
+                ctx.invalidate(tmp_pdf)  # rewritten in place
+                with metrics.stage("skip_early", tmp_pdf):
+                    extract_pages(tmp_pdf, tmp_pdf, pages_to_skip=drop)
+                metadata["skipped_pages"] = [plan.input_page(p) for p in drop]
+                plan = plan.without(drop)
+            else:
+                skip_after = pages_to_skip
+
+        # Detect if scanned
+        with metrics.stage("classify"):
+            ocr_pages = None
+            if selective_ocr_flag and output_pages != "2":
+                # OCR only the pages without a text layer, keep the text pages as-is
+                page_classes = classify_pages(tmp_pdf, ctx=ctx, store=False)["pages"]
+                image_pages = [p for p, c in page_classes.items() if c == PAGE_IMAGE]
+                is_scan = bool(image_pages)
+                if image_pages and len(image_pages) < len(page_classes):
+                    ocr_pages = image_pages
+                    metadata["ocr_pages"] = ocr_pages
+            elif is_scan is None:
+                is_scan = is_scanned_or_hybrid(
+                    tmp_pdf, first=classify_first, spaced=classify_spaced, ctx=ctx
+                )
+        rotated = False
+
+        if debug_flag:
+            print(f"[DEBUG] PDF was scanned:  {is_scan}")
+            if ocr_pages:
+                print(f"[DEBUG] OCR pages only:  {ocr_pages}")
+
+        # The scanned pipeline and OCR run on work_pdf -> ocr_pdf
+        work_pdf, ocr_pdf = tmp_pdf, output_pdf
+        if ocr_pages:
+            work_pdf = tmp_pdf.with_suffix(".part.pdf")
+            ocr_pdf = tmp_pdf.with_suffix(".part.ocr.pdf")
+            extract_pages(tmp_pdf, work_pdf, pages_to_keep=ocr_pages, ctx=ctx)
+
+        # Look up the OCR'd result of a previous run with the same input + options.
+        # A hit skips the scanned pipeline - no images dir is written, the
+        # per-page metadata (CACHED_METADATA) is restored from the entry
+        ocr_cache = None
+        cache_key = None
+        cache_hit = False
+        if is_scan and export_format == "png" and not no_cache_flag:
+            ocr_cache = OcrCache(max_mb=cache_size_mb)
+            # Results without unpaper differ - do not serve them once it runs
+            unpaper_available = get_unpaper_version()[0]
+            cache_key = ocr_cache.make_key(
+                input_pdf,
+                pages=plan.pages,
+                ocrlib=ocrlib,
+                languages=languages,
+                dpi=dpi,
+                unpaper_ok=unpaper_available,
+                # pre_rotate also turns off OSD - keyed even without unpaper
+                pre_rotate=pre_rotate,
+                layout=layout,
+                output_pages=output_pages,
+                unpaper_args=get_unpaper_args(
+                    layout=layout,
+                    output_pages=output_pages,
+                    pre_rotate=pre_rotate,
+                    get_default=True,
+                    unpaper_ok=unpaper_available,
+                ),
+                remove_background_flag=remove_background_flag,
+                crop_tool=crop_tool,
+                osd_options=_get_osd_options(osd_dpi, osd_max_pixels, osd_min_conf),
+                ocr_pages=ocr_pages,
+            )
+            cache_hit = ocr_cache.get(cache_key, output_pdf)
+            metadata["ocr_cache"] = "hit" if cache_hit else "miss"
+            if cache_hit:
+                metadata.update(ocr_cache.get_meta(cache_key))
+
+        if debug_flag and ocr_cache:
+            print(f"[DEBUG] OCR cache {metadata['ocr_cache']}:  {cache_key}")
+
+        # If scanned -> process scanned pipeline
+        unpaper_ok = False
+        if is_scan and not cache_hit:
+            # Wait for room for the page images within the workspace quota
+            workspace.reserve(estimate_scan_mb(count_pdf_pages(work_pdf, ctx=ctx), dpi))
+            if workspace.waited:
+                metadata["workspace_wait_s"] = round(workspace.waited, 1)
+
+            unpaper_ok, work_pdf, images_dir = _process_scanned(
+                work_pdf,
+                scan_pdf,
+                dpi,
+                pre_rotate,
+                layout,
+                output_pages,
+                remove_background_flag,
+                debug_flag,
+                scan_dir,
+                images_dir,
+                export_format=export_format,
+                render_jobs=render_jobs,
+                unpaper_jobs=unpaper_jobs,
+                unpaper_batch=unpaper_batch_flag,
+                in_memory_flag=in_memory_flag,
+                osd_options=_get_osd_options(osd_dpi, osd_max_pixels, osd_min_conf),
+                crop_tool=crop_tool,
+                metadata=metadata,
+                ctx=ctx,
+                metrics=metrics,
+                workspace=workspace.path,
+                env=env,
+                # Working pages are the OCR pages of tmp_pdf with --selective-ocr
+                page_map=[
+                    plan.input_page(p) for p in ocr_pages or range(1, len(plan) + 1)
+                ],
+            )
+
+        # OCR or copy final - on a cache hit output_pdf is already in place
+        if is_scan and export_format == "png":
+            if not cache_hit:
+                with metrics.stage("ocr", ocr_pdf):
+                    run_ocr(
+                        work_pdf,
+                        ocr_pdf,
+                        images_dir,
+                        lang=languages,
+                        ocrlib=ocrlib,
+                        layout=layout,
+                        output_pages=output_pages,
+                        rotated=rotated,
+                        unpaper_ok=unpaper_ok,
+                        ocr_jobs=ocr_jobs,
+                        debug_flag=debug_flag,
+                        env=env,
+                    )
+                # Splice the OCR'd pages back among the untouched text pages
+                if ocr_pages:
+                    with metrics.stage("splice", output_pdf):
+                        replace_pages(tmp_pdf, ocr_pdf, ocr_pages, output_pdf, ctx=ctx)
+                if ocr_cache and output_pdf.exists():
+                    cached_meta = {
+                        k: metadata[k] for k in CACHED_METADATA if k in metadata
+                    }
+                    ocr_cache.put(cache_key, output_pdf, meta=cached_meta)
+        else:
+            if tmp_pdf != output_pdf:
+                shutil.copy2(tmp_pdf, output_pdf)
+                ctx.alias(output_pdf, tmp_pdf)
+
+        for path in {tmp_pdf, work_pdf, ocr_pdf} - {output_pdf}:
+            ctx.invalidate(path)
+            if path.exists():
+                path.unlink()
+
+        # Remove pages to skip
+        if skip_after is None and skip_pages_str:
+            skip_after = parse_page_ranges(skip_pages_str, total_pages=total_pages_in)
+        if skip_after is not None:
+            ctx.invalidate(output_pdf)
+            with metrics.stage("skip_post", output_pdf):
+                extract_pages(output_pdf, output_pdf, pages_to_skip=skip_after)
+
+        # Extract images and thumbnails
+        if output_pdf.exists():
+            if export_images_flag:
+                with metrics.stage("images", images_dir):
+                    export_images(
+                        output_pdf,
+                        images_dir,
+                        dpi=dpi,
+                        fext=export_format,
+                        jobs=render_jobs,
+                        ctx=ctx,
+                    )
 
-    # Extract images and thumbnails
-    if output_pdf.exists():
-        if export_images_flag or export_thumbs_flag:
-            export_images(output_pdf, images_dir, dpi=dpi, fext=export_format)
+            if export_thumbs_flag:
+                with metrics.stage("thumbnails", thumbs_dir):
+                    export_pdf_thumbnails(
+                        output_pdf, thumbs_dir, fext=thumb_format, ctx=ctx
+                    )
 
-        if export_thumbs_flag:
-            export_thumbnails(images_dir, thumbs_dir)
+        total_pages_out = count_pdf_pages(output_pdf, ctx=ctx)
 
-    total_pages_out = count_pdf_pages(output_pdf)
+        # Export texts and detect DOI
+        if (export_texts_flag or get_doi_flag) and total_pages_out > 0:
+            texts_dir = output_dir / f"{txt_dir}_{input_pdf.stem}"
+            summary_txt = output_dir / f"{input_pdf.stem}.txt"
+            text_outputs = [texts_dir, summary_txt]
 
-    # Export texts and detect DOI
-    if (export_texts_flag or get_doi_flag) and total_pages_out > 0:
-        texts_dir = output_dir / f"{txt_dir}_{input_pdf.stem}"
-        text_pages = export_text(output_pdf, texts_dir)
+            jsonl_path = None
+            if text_jsonl_flag:
+                jsonl_path = output_dir / f"{input_pdf.stem}.texts.jsonl"
+                text_outputs.append(jsonl_path)
 
-        if text_pages:
-            summary_txt = output_dir / f"{input_pdf.stem}.txt"
-            with summary_txt.open("w", encoding="utf-8") as f:
-                for page_num, text in text_pages.items():
-                    f.write(f"--- Page {page_num} of {total_pages_out} ---\n")
-                    f.write(text)
-                    f.write("\n\n")
+            # Only the pages the DOI search reads are kept in memory
+            doi_pages = []
+            if get_doi_flag:
+                doi_pages = doi_page_window(total_pages_out, doi_first, doi_last)
+
+            with metrics.stage("text_export", *text_outputs):
+                text_pages = export_texts(
+                    output_pdf,
+                    texts_dir,
+                    summary_path=summary_txt,
+                    jsonl_path=jsonl_path,
+                    structure=text_structure,
+                    keep_pages=set(doi_pages),
+                    ctx=ctx,
+                )
 
             if get_doi_flag:
-                doi_list = get_doi(texts_dir)
+                doi_list = get_doi(
+                    text_pages=text_pages, first=doi_first, last=doi_last
+                )
                 metadata["doi"] = doi_list
                 if doi_list:
                     print("DOI: ", doi_list)
 
+    if metrics.enabled:
+        metadata["metrics"] = metrics.as_list()
+        metrics.write_log(input=input_pdf, output=output_pdf)
+
     output_json = output_dir / f"{input_pdf.stem}.meta.json"
     write_json(metadata, output_json)
@@ -1,8 +1,15 @@
+import json
+import os
+import re
+import shutil
 import sys
 import subprocess
 from pathlib import Path
 from typing import List
 
+from .utils.cache import get_cache_dir
+from .utils.common import tool_env
+
 
 def patch_windows_unpaper_args(args):
     if sys.platform.startswith("win"):
@@ -60,25 +67,137 @@ def get_unpaper_args(
     return unpaper_args_list
 
 
-def get_unpaper_version():
-    cmd = ["unpaper", "--version"]
+PROBE_CACHE_SUBDIR = "probe-cache"
+PROBE_CACHE_FILE = "unpaper.json"
+PAT_UNPAPER_VERSION = re.compile(r"\d+(?:\.\d+)+")
+PAT_UNPAPER_FLAG = re.compile(r"(?<![\w-])--[a-z][a-z0-9-]*")
 
-    cmd = patch_windows_unpaper_args(cmd)
+# Per process probe results - {(binary path, mtime): probe}
+_probe_cache = {}
 
-    # Run Unpaper
-    result = subprocess.run(
-        cmd,
-        stdout=subprocess.PIPE,  # capture output
-        stderr=subprocess.STDOUT,
-        text=True,
-        check=False,
-        timeout=2.0,
-    )
 
-    if "error" in result.stdout.strip():
-        return False, "Failed to get the version"
-    else:
-        return True, result.stdout.strip()
+def find_unpaper() -> Path | None:
+    binary = shutil.which(patch_windows_unpaper_args(["unpaper"])[0])
+    return Path(binary).resolve() if binary else None
+
+
+def _run_unpaper_probe(binary: Path) -> dict:
+    """Run unpaper --version and --help - never raises."""
+    probe = {"ok": False, "version": None, "flags": [], "message": ""}
+
+    try:
+        result = subprocess.run(
+            [str(binary), "--version"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            check=False,
+            timeout=2.0,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        probe["message"] = f"Failed to get the version - {e}"
+        return probe
+
+    output = result.stdout.strip()
+    version = PAT_UNPAPER_VERSION.search(output)
+    if result.returncode != 0 or not version or "error" in output.lower():
+        probe["message"] = f"Failed to get the version - {output}"
+        return probe
+
+    probe.update({"ok": True, "version": version.group(0), "message": output})
+
+    try:
+        result = subprocess.run(
+            [str(binary), "--help"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            check=False,
+            timeout=2.0,
+        )
+        probe["flags"] = sorted(set(PAT_UNPAPER_FLAG.findall(result.stdout)))
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+    return probe
+
+
+def _probe_cache_path() -> Path:
+    return get_cache_dir(PROBE_CACHE_SUBDIR) / PROBE_CACHE_FILE
+
+
+def _read_probe_cache() -> dict:
+    try:
+        with _probe_cache_path().open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_probe_cache(key: str, probe: dict):
+    path = _probe_cache_path()
+    entries = _read_probe_cache()
+    entries[key] = probe
+
+    partial = path.with_suffix(f".{os.getpid()}.part")
+    try:
+        with partial.open("w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(partial, path)
+    except OSError:
+        partial.unlink(missing_ok=True)
+
+
+def get_unpaper_info(use_disk_cache: bool = True) -> dict:
+    """
+    Probe unpaper once - cached per process and on disk, keyed by the
+    resolved binary path and its mtime, so a new binary is probed again.
+
+    Only successful probes go to disk - a failure (e.g. Docker not started
+    yet on Windows) is retried by the next process.
+
+    :return: {"ok", "version", "flags", "message", "binary"}
+    """
+    binary = find_unpaper()
+    if binary is None:
+        return {
+            "ok": False,
+            "version": None,
+            "flags": [],
+            "message": "unpaper not found",
+            "binary": None,
+        }
+
+    mtime = binary.stat().st_mtime_ns
+    key = f"{binary}|{mtime}"
+
+    if key in _probe_cache:
+        return _probe_cache[key]
+
+    probe = _read_probe_cache().get(key) if use_disk_cache else None
+    if probe is None:
+        probe = _run_unpaper_probe(binary)
+        probe["binary"] = str(binary)
+        if probe["ok"] and use_disk_cache:
+            _write_probe_cache(key, probe)
+
+    _probe_cache[key] = probe
+
+    return probe
+
+
+def unpaper_supports(*flags) -> bool:
+    info = get_unpaper_info()
+    return info["ok"] and all(flag in info["flags"] for flag in flags)
+
+
+def get_unpaper_version():
+    info = get_unpaper_info()
+
+    if not info["ok"]:
+        return False, info["message"]
+
+    return True, info["message"]
 
 
 def run_unpaper_simple(
@@ -87,6 +206,7 @@ def run_unpaper_simple(
     tmpdir: Path,
     dpi: float = 300,
     mode_args: List[str] = None,
+    env: dict = None,
 ) -> None:
     """
     Run unpaper via the unpaper.CMD wrapper (Docker-based).
@@ -96,6 +216,7 @@ def run_unpaper_simple(
         output_file (Path): Target PNM (or PNG).
         dpi (float): Resolution in DPI (default: 300).
         mode_args (List[str]): Extra unpaper options.
+        env (dict): Environment - default tool_env(tmpdir).
     """
     if mode_args is None:
         mode_args = []
@@ -126,6 +247,7 @@ def run_unpaper_simple(
         stderr=subprocess.STDOUT,
         text=True,
         cwd=tmpdir,
+        env=env or tool_env(tmpdir),
     )
 
     if result.returncode != 0:
@@ -134,3 +256,91 @@ def run_unpaper_simple(
             f"Command: {' '.join(cmd)}\n"
             f"Output:\n{result.stdout}"
         )
+
+
+PAT_SHEET_NUMBER = re.compile(r"^(.*?)(\d+)$")
+
+
+def get_sheet_runs(files: List[Path]) -> List[tuple]:
+    """
+    Group page images into runs unpaper can read with one %0Nd pattern -
+    same directory, prefix, digit width and suffix, consecutive numbers.
+
+    :return: [(input pattern, [(sheet number, file), ...]), ...]
+    """
+    runs = []
+    last = None
+
+    for path in files:
+        path = Path(path)
+        match = PAT_SHEET_NUMBER.match(path.stem)
+        if not match:
+            runs.append((None, [(None, path)]))
+            last = None
+            continue
+
+        prefix, digits = match.groups()
+        number = int(digits)
+        pattern = str(path.parent / f"{prefix}%0{len(digits)}d{path.suffix}")
+
+        if last and last[0] == pattern and last[1][-1][0] == number - 1:
+            last[1].append((number, path))
+        else:
+            last = (pattern, [(number, path)])
+            runs.append(last)
+
+    return runs
+
+
+def run_unpaper_batch(
+    input_pattern: str,
+    output_pattern: str,
+    tmpdir: Path,
+    start_sheet: int,
+    end_sheet: int,
+    dpi: float = 300,
+    mode_args: List[str] = None,
+    env: dict = None,
+) -> subprocess.CompletedProcess:
+    """
+    Run one unpaper process over the sheets start_sheet..end_sheet.
+
+    Output files are numbered from 1 - output_pages outputs per sheet.
+    Does not raise on failure, the caller checks which outputs exist.
+
+    Args:
+        input_pattern (str): e.g. "page_%03d.png"
+        output_pattern (str): e.g. "out_%04d.pnm"
+    """
+    if mode_args is None:
+        mode_args = []
+
+    Path(output_pattern).parent.mkdir(parents=True, exist_ok=True)
+
+    cmd = (
+        [
+            "unpaper",
+            "-v",
+            "--dpi",
+            str(round(dpi, 6)),
+            "--start-sheet",
+            str(start_sheet),
+            "--end-sheet",
+            str(end_sheet),
+            "--start-output",
+            "1",
+        ]
+        + mode_args  # noqa: W503
+        + [input_pattern, output_pattern]  # noqa: W503
+    )
+
+    cmd = patch_windows_unpaper_args(cmd)
+
+    return subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        cwd=tmpdir,
+        env=env or tool_env(tmpdir),
+    )
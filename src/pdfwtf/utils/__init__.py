@@ -0,0 +1,3 @@
+from .common import parse_page_ranges
+
+__all__ = ["parse_page_ranges"]
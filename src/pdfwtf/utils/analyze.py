@@ -1,6 +1,8 @@
 import fitz
 import re
 
+from .context import fitz_document
+
 PAGE_NUMBER_RE = re.compile(r"^\s*[\W_]*\d+[\W_]*\s*$")
 
 
@@ -25,31 +27,130 @@ def is_meaningful_text(text, min_chars=30, min_words=5):
 def page_has_large_image(page, min_area_ratio=0.4):
     page_area = page.rect.width * page.rect.height
     for img in page.get_images(full=True):
-        xref = img[0]
-        bbox = page.get_image_bbox(xref)
+        # needs the full image item - a bare xref raises "bad image name"
+        bbox = page.get_image_bbox(img)
+        if bbox.is_infinite or bbox.is_empty:
+            continue
         img_area = bbox.width * bbox.height
         if img_area / page_area >= min_area_ratio:
             return True
     return False
 
 
-def is_scanned_or_hybrid(filepath):
+PAGE_TEXT = "text"  # meaningful text layer, no large image
+PAGE_IMAGE = "image"  # no meaningful text layer
+PAGE_HYBRID = "hybrid"  # meaningful text layer over a large image
+
+
+def classify_page(page, text: str = None) -> str:
+    """Classify a fitz page as PAGE_TEXT, PAGE_IMAGE or PAGE_HYBRID."""
+    if text is None:
+        text = page.get_text("text")
+
+    # Remove trivial page-number-only lines
+    lines = [line for line in text.splitlines() if not PAGE_NUMBER_RE.match(line)]
+    cleaned = " ".join(lines)
+
+    if not is_meaningful_text(cleaned):
+        return PAGE_IMAGE
+
+    if page_has_large_image(page):
+        return PAGE_HYBRID
+
+    return PAGE_TEXT
+
+
+def select_sample_pages(total_pages, first=None, spaced=None) -> list[int]:
     """
-    Returns True for scanned OR hybrid PDFs.
-    Returns False only for truly born-digital PDFs.
+    Pick 0-based page indices to inspect: the first N pages plus
+    M evenly spaced pages (always including the last one).
+    All pages when neither is given.
     """
-    with fitz.open(filepath) as doc:
-        for page in doc:
-            text = page.get_text("text")
+    if not first and not spaced:
+        return list(range(total_pages))
+
+    pages = set(range(min(first or 0, total_pages)))
+
+    if spaced and total_pages:
+        if spaced == 1:
+            pages.add(total_pages - 1)
+        else:
+            step = (total_pages - 1) / (spaced - 1)
+            pages.update(round(i * step) for i in range(spaced))
+
+    return sorted(p for p in pages if p < total_pages)
 
-            # Remove trivial page-number-only lines
-            lines = [
-                line for line in text.splitlines() if not PAGE_NUMBER_RE.match(line)
-            ]
-            cleaned = " ".join(lines)
 
-            if is_meaningful_text(cleaned):
-                if not page_has_large_image(page):
-                    return False  # born-digital
+def classify_pages(
+    filepath, first=None, spaced=None, stop_on_text=False, ctx=None, store=True
+) -> dict:
+    """
+    Classify (a sample of) PDF pages.
+
+    :param first: inspect the first N pages
+    :param spaced: inspect M evenly spaced pages
+    :param stop_on_text: stop at the first PAGE_TEXT page
+    :param ctx: DocumentContext - share the open document and page texts
+    :param store: keep the inspected pages and texts in ctx - False when
+        every page is inspected once and nothing reads them again
+    :return: {
+        "total_pages": int,
+        "pages": {1-based page: class},
+        "kind": "born-digital" | "scanned" | "hybrid",
+        "coverage": share of inspected pages,
+        "confidence": 0-1 estimate that unseen pages do not change "kind",
+    }
+    """
+    page_classes = {}
+
+    with fitz_document(filepath, ctx) as doc:
+        total_pages = len(doc)
+
+        for i in select_sample_pages(total_pages, first=first, spaced=spaced):
+            if ctx is not None and store:
+                page = ctx.page(filepath, i)
+                page_class = classify_page(page, ctx.page_text(filepath, i))
+            else:
+                page_class = classify_page(doc[i])
+            page_classes[i + 1] = page_class
+            if stop_on_text and page_class == PAGE_TEXT:
+                break
+
+    inspected = len(page_classes)
+    text_pages = sum(1 for c in page_classes.values() if c == PAGE_TEXT)
+
+    if inspected and text_pages == inspected:
+        kind = "born-digital"
+    elif text_pages == 0:
+        kind = "scanned"
+    else:
+        kind = "hybrid"
+
+    if kind == "hybrid" or inspected == total_pages:
+        confidence = 1.0
+    else:
+        # Rule of succession - chance the next unseen page is alike
+        confidence = (inspected + 1) / (inspected + 2)
+
+    return {
+        "total_pages": total_pages,
+        "pages": page_classes,
+        "kind": kind,
+        "coverage": round(inspected / total_pages, 4) if total_pages else 1.0,
+        "confidence": round(confidence, 4),
+    }
+
+
+def is_scanned_or_hybrid(filepath, first=None, spaced=None, ctx=None):
+    """
+    Returns True for scanned OR hybrid PDFs.
+    Returns False only for truly born-digital PDFs.
+
+    With first/spaced only a sample of pages is inspected.
+    """
+    result = classify_pages(
+        filepath, first=first, spaced=spaced, stop_on_text=True, ctx=ctx
+    )
 
-    return True  # scanned or hybrid
+    # born-digital as soon as one born-digital page is found
+    return PAGE_TEXT not in result["pages"].values()
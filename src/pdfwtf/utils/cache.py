@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from .common import get_temp_dir
+
+CACHE_SUBDIR = "ocr-cache"
+DEFAULT_CACHE_SIZE_MB = 2048
+ORPHAN_META_SECONDS = 60
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Hash file content in chunks - memory use does not grow with file size."""
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cache_dir(subdir: str = CACHE_SUBDIR) -> Path:
+    env_cache_dir = os.environ.get("PDFWTF_CACHE_DIR")
+    if env_cache_dir:
+        cache_dir = Path(env_cache_dir).resolve()
+        if subdir != CACHE_SUBDIR:
+            cache_dir = cache_dir / subdir
+    else:
+        cache_dir = get_temp_dir() / subdir
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    return cache_dir
+
+
+class OcrCache:
+    """
+    Content-addressed on-disk cache of OCR'd PDFs.
+
+    Entries are keyed by the input content hash plus the OCR-relevant
+    options and evicted least-recently-used first once the cache grows
+    over max_bytes. Writes are atomic, so concurrent jobs can share it.
+    """
+
+    def __init__(self, cache_dir: Path = None, max_mb: int = DEFAULT_CACHE_SIZE_MB):
+        self.cache_dir = Path(cache_dir) if cache_dir else get_cache_dir()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_mb * 1024 * 1024
+
+    def make_key(self, input_pdf: Path, **options) -> str:
+        digest = hashlib.sha256(file_sha256(input_pdf).encode("ascii"))
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pdf"
+
+    def _meta_entry(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str, output_pdf: Path) -> bool:
+        """Copy a cached PDF to output_pdf - returns False on a miss."""
+        entry = self._entry(key)
+        try:
+            shutil.copyfile(entry, output_pdf)
+            os.utime(entry)  # mark as recently used
+        except FileNotFoundError:
+            return False
+
+        return True
+
+    def get_meta(self, key: str) -> dict:
+        """Metadata stored with an entry - empty if there is none."""
+        try:
+            return json.loads(self._meta_entry(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def put(self, key: str, pdf_path: Path, meta: dict = None):
+        """
+        :param meta: JSON metadata of the run to restore on a hit
+        """
+        entry = self._entry(key)
+        partial = self.cache_dir / f"{key}.{uuid.uuid4().hex}.part"
+        try:
+            # Metadata first - an entry is visible only with its metadata
+            partial.write_text(json.dumps(meta or {}), encoding="utf-8")
+            os.replace(partial, self._meta_entry(key))
+            shutil.copyfile(pdf_path, partial)
+            os.replace(partial, entry)
+        finally:
+            if partial.exists():
+                partial.unlink()
+
+        self.evict()
+
+    def evict(self):
+        # Metadata left without its PDF by an interrupted put - not one
+        # that is being written right now
+        for meta in self.cache_dir.glob("*.json"):
+            try:
+                orphan = not meta.with_suffix(".pdf").exists() and (
+                    time.time() - meta.stat().st_mtime > ORPHAN_META_SECONDS
+                )
+            except FileNotFoundError:
+                continue
+            if orphan:
+                meta.unlink(missing_ok=True)
+
+        entries = []
+        for path in self.cache_dir.glob("*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
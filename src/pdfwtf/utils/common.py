@@ -2,19 +2,29 @@ import json
 import os
 import re
 import shutil
+import io
+import shlex
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import fitz  # PyMuPDF
 import img2pdf
 import pikepdf
 import cv3
+import numpy as np
 from PIL import Image, ImageOps
 from typing import Union, List, Dict, Any
 import pytesseract
 
+from .context import pikepdf_document
+
 PAT_DOI = re.compile(r"(?:https?://)?doi\.org/(10\.\d{4,9}/[^\s]+)", re.IGNORECASE)
 
 RELATIVE_OUTPUT_DIR = "_data/out-pdf"
 
+# Minimal Tesseract orientation_conf to trust OSD on a downscaled page
+OSD_MIN_CONFIDENCE = 2.0
+
 
 def find_project_root(marker="instance") -> Path:
     """
@@ -55,6 +65,23 @@ def get_temp_dir(clean: bool = False, debug=False) -> Path:
     return temp_dir
 
 
+def tool_env(tmp_dir: Path, workspace_root: Path = None) -> dict:
+    """
+    Environment for the external tools of one job - OCRmyPDF, Tesseract and
+    unpaper write their temp files to tmp_dir instead of the system temp.
+
+    :param workspace_root: mounted by the persistent unpaper container
+        (UNPAPER_WRAP_WORKSPACE) unless set by the user
+    """
+    env = dict(os.environ)
+    for name in ("TMPDIR", "TEMP", "TMP"):
+        env[name] = str(tmp_dir)
+    if workspace_root:
+        env.setdefault("UNPAPER_WRAP_WORKSPACE", str(workspace_root))
+
+    return env
+
+
 def get_output_dir(output_dir=None) -> Path:
 
     if output_dir:
@@ -72,7 +99,7 @@ def get_output_dir(output_dir=None) -> Path:
 
 
 def get_output_dir_final(
-    output_dir: Path, input_pdf: Path, input_path_prefix: str = None
+    output_dir: Path, input_pdf: Path, input_path_prefix: str = None, create=True
 ) -> Path:
 
     if not input_path_prefix:
@@ -93,7 +120,8 @@ def get_output_dir_final(
 
     output_dir = output_dir / relative_subpath
 
-    output_dir.mkdir(parents=True, exist_ok=True)
+    if create:
+        output_dir.mkdir(parents=True, exist_ok=True)
 
     return output_dir
 
@@ -121,6 +149,22 @@ def parse_page_ranges(pages_str, total_pages=None):
     return sorted(pages)
 
 
+def chunk_list(items: list, n: int) -> List[list]:
+    """Split items into at most n contiguous, nearly equal chunks."""
+    n = max(1, min(n, len(items)))
+    size, rest = divmod(len(items), n)
+
+    chunks = []
+    start = 0
+    for i in range(n):
+        end = start + size + (1 if i < rest else 0)
+        if end > start:
+            chunks.append(items[start:end])
+        start = end
+
+    return chunks
+
+
 def images_to_pdf(images_dir: Path, output_pdf: Path, dpi=300, fext="png"):
     # collect all images in natural sort order
     image_files = sorted(images_dir.glob(f"*.{fext}"))
@@ -137,9 +181,13 @@ def extract_pages(
     pages_to_keep: List[int] = None,
     pages_to_skip: List[int] = None,
     zero_based: bool = False,
+    ctx=None,
 ):
     """
     Create a new PDF with specified pages.
+
+    :param ctx: DocumentContext sharing the open input_pdf - the caller
+        invalidates it when output_pdf is input_pdf
     """
     if not pages_to_keep and not pages_to_skip:
         return
@@ -154,13 +202,17 @@ def extract_pages(
     try:
         new_pdf = pikepdf.Pdf.new()
 
-        with pikepdf.open(input_pdf) as pdf:
-            for i, page in enumerate(pdf.pages):
-                if pages_to_keep:
-                    if i in pages_to_keep:
-                        new_pdf.pages.append(page)
-                elif pages_to_skip:
-                    if i not in pages_to_skip:
+        with pikepdf_document(input_pdf, ctx) as pdf:
+            total = len(pdf.pages)
+            if pages_to_keep:
+                # Touch only the kept pages - no walk over the whole document
+                for i in sorted(set(pages_to_keep)):
+                    if 0 <= i < total:
+                        new_pdf.pages.append(pdf.pages[i])
+            elif pages_to_skip:
+                skip = set(pages_to_skip)
+                for i, page in enumerate(pdf.pages):
+                    if i not in skip:
                         new_pdf.pages.append(page)
 
         new_pdf.save(output_pdf)
@@ -169,6 +221,32 @@ def extract_pages(
         raise RuntimeError(f"Failed to extract pages: {e}")
 
 
+def replace_pages(
+    base_pdf: Path,
+    pages_pdf: Path,
+    page_numbers: List[int],
+    output_pdf: Path,
+    ctx=None,
+):
+    """
+    Replace the given 1-based pages of base_pdf with the pages of pages_pdf
+    (in order) and save the result as output_pdf.
+    """
+    try:
+        # base_pdf is modified - always open a private copy
+        with pikepdf.open(base_pdf) as pdf, pikepdf_document(pages_pdf, ctx) as src:
+            if len(src.pages) != len(page_numbers):
+                raise ValueError(
+                    f"{len(src.pages)} replacement pages for {len(page_numbers)} pages"
+                )
+            for page_number, page in zip(page_numbers, src.pages):
+                pdf.pages[page_number - 1] = page
+
+            pdf.save(output_pdf)
+    except Exception as e:
+        raise RuntimeError(f"Failed to replace pages: {e}")
+
+
 def export_thumbnails(
     images_dir: "Path",
     thumbs_dir: "Path",
@@ -242,9 +320,11 @@ def clear_dir(p: Path):
     return True
 
 
-def count_pdf_pages(pdf_path: Path) -> int:
+def count_pdf_pages(pdf_path: Path, ctx=None) -> int:
     if not pdf_path.is_file():
         return 0
+    if ctx is not None:
+        return ctx.page_count(pdf_path)
     with pikepdf.open(pdf_path) as pdf:
         return len(pdf.pages)
 
@@ -256,27 +336,166 @@ def detect_orientation(image_path: Path) -> dict:
     return osd_dict
 
 
-def correct_images_orientation(image_paths: list[Path]) -> bool:
+def downscale_for_osd(
+    img: Image.Image, src_dpi: int = 300, osd_dpi: int = None, max_pixels: int = None
+) -> tuple[Image.Image, int]:
+    """
+    Make a grayscale copy of an image reduced to about osd_dpi and/or
+    about max_pixels - OSD does not need the full scan resolution.
+
+    :return: (image, its effective DPI) - the original image if no reduction
+    """
+    scale = 1.0
+    if osd_dpi and src_dpi:
+        scale = min(scale, osd_dpi / src_dpi)
+    if max_pixels:
+        scale = min(scale, (max_pixels / (img.width * img.height)) ** 0.5)
+
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    if scale >= 1 or size == img.size:
+        return img, src_dpi
+
+    small = img.convert("L").resize(size, Image.Resampling.BOX, reducing_gap=2.0)
+
+    return small, round(src_dpi * scale) if src_dpi else None
+
+
+def tesseract_osd(img: Image.Image, config: str = "") -> dict:
     """
-    Detects the orientation of multiple images, rotates them in-place if needed,
-    and returns True if any image was rotated.
+    Tesseract OSD of an in-memory image - pytesseract.image_to_osd with the
+    DICT output, except the subprocess runs single-threaded
+    (OMP_THREAD_LIMIT=1) unless OMP_THREAD_LIMIT is set. Parallel OSD
+    workers would otherwise each start several OpenMP threads.
+    """
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+
+    cmd = [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout"]
+    cmd += ["-l", "osd", "--psm", "0"] + shlex.split(config)
+
+    env = dict(os.environ)
+    if not env.get("OMP_THREAD_LIMIT", "").isnumeric():
+        env["OMP_THREAD_LIMIT"] = "1"
+
+    try:
+        result = subprocess.run(cmd, input=buf.getvalue(), capture_output=True, env=env)
+    except FileNotFoundError:
+        raise pytesseract.TesseractNotFoundError()
+
+    if result.returncode:
+        raise pytesseract.TesseractError(
+            result.returncode, result.stderr.decode("utf-8", "replace").strip()
+        )
+
+    return pytesseract.pytesseract.osd_to_dict(result.stdout.decode("utf-8", "replace"))
+
+
+def detect_rotation(
+    img: Image.Image,
+    src_dpi: int = 300,
+    osd_dpi: int = None,
+    max_pixels: int = None,
+    min_confidence: float = OSD_MIN_CONFIDENCE,
+) -> int:
+    """
+    Detect the rotation of an image using Tesseract OSD.
+
+    With osd_dpi/max_pixels the detection runs on a reduced grayscale copy,
+    falling back to the full resolution when its orientation confidence
+    is below min_confidence (or tesseract cannot decide at all).
+    """
+    small, small_dpi = downscale_for_osd(img, src_dpi, osd_dpi, max_pixels)
+
+    if small is not img:
+        try:
+            osd = tesseract_osd(small, config=f"--dpi {small_dpi}" if small_dpi else "")
+            if osd.get("orientation_conf", 0) >= min_confidence:
+                return osd.get("rotate", 0)
+        except pytesseract.TesseractError:
+            pass
+        finally:
+            small.close()
+
+    osd = tesseract_osd(img)
+
+    return osd.get("rotate", 0)
+
+
+def correct_image_orientation(
+    img: Image.Image, **osd_options
+) -> tuple[Image.Image, int]:
+    """
+    Detect the orientation of an in-memory image and rotate it if needed.
+
+    :param osd_options: passed to detect_rotation
+    :return: (image, applied rotation angle)
+    """
+    rotate_angle = detect_rotation(img, **osd_options)
+
+    if rotate_angle != 0:
+        img = img.rotate(-rotate_angle, expand=True)
+
+    return img, rotate_angle
+
+
+def get_osd_workers(jobs: int = None) -> int:
+    """
+    Size the OSD worker pool to the available cores divided by
+    OMP_THREAD_LIMIT, so parallel tesseract processes do not oversubscribe.
+    Unset, OSD runs single-threaded - see tesseract_osd.
+    """
+    cpus = os.cpu_count() or 1
+    try:
+        omp_threads = int(os.environ.get("OMP_THREAD_LIMIT", "1"))
+    except ValueError:
+        omp_threads = 1
+
+    workers = max(1, cpus // max(1, omp_threads))
+    if jobs:
+        workers = min(workers, jobs)
+
+    return workers
+
+
+def _correct_image_file_orientation(path: Path, osd_options: dict) -> int:
+    with Image.open(path) as img:
+        img, rotate_angle = correct_image_orientation(img, **osd_options)
+
+        if rotate_angle != 0:
+            img.save(path)  # Overwrite original
+
+    return rotate_angle
+
+
+def correct_images_orientation(
+    image_paths: list[Path], jobs: int = None, **osd_options
+) -> Dict[str, int]:
+    """
+    Detects the orientation of multiple images in parallel and rotates them
+    in-place if needed.
 
     :param image_paths: List of Path objects pointing to image files
-    :return: True if at least one image was rotated, False otherwise
+    :param jobs: max number of parallel tesseract processes
+        (default: CPU count / OMP_THREAD_LIMIT)
+    :param osd_options: passed to detect_rotation (src_dpi, osd_dpi, ...)
+    :return: rotation map {file name: applied angle} of the rotated images
     """
-    rotated_count = 0
+    rotations = {}
 
-    for path in image_paths:
-        with Image.open(path) as img:
-            osd = pytesseract.image_to_osd(img, output_type=pytesseract.Output.DICT)
-            rotate_angle = osd.get("rotate", 0)
+    if not image_paths:
+        return rotations
 
+    with ThreadPoolExecutor(max_workers=get_osd_workers(jobs)) as executor:
+        angles = executor.map(
+            lambda path: _correct_image_file_orientation(path, osd_options),
+            image_paths,
+        )
+
+        for path, rotate_angle in zip(image_paths, angles):
             if rotate_angle != 0:
-                img = img.rotate(-rotate_angle, expand=True)
-                img.save(path)  # Overwrite original
-                rotated_count += 1
+                rotations[path.name] = rotate_angle
 
-    return rotated_count
+    return rotations
 
 
 def crop_dark_background(image_paths: List[Path], tool="pillow") -> int:
@@ -284,15 +503,17 @@ def crop_dark_background(image_paths: List[Path], tool="pillow") -> int:
     Crop the main content of multiple images with dark backgrounds.
 
     :param image_paths: List of Path objects pointing to image files
-    :param tool: "opencv" or "pillow" to choose the cropping method
+    :param tool: "opencv", "pillow" or "numpy" to choose the cropping method
     :return: Number of images that were actually cropped
     """
     if tool == "opencv":
         return crop_dark_background_opencv(image_paths)
     elif tool == "pillow":
         return crop_dark_background_pillow(image_paths)
+    elif tool == "numpy":
+        return crop_dark_background_numpy(image_paths)
     else:
-        raise ValueError("Invalid tool specified. Use 'opencv' or 'pillow'.")
+        raise ValueError("Invalid tool specified. Use 'opencv', 'pillow' or 'numpy'.")
 
 
 def crop_dark_background_opencv(image_paths: list[Path]) -> int:
@@ -321,38 +542,118 @@ def crop_dark_background_opencv(image_paths: list[Path]) -> int:
     return cropped_count
 
 
+def find_page_bbox_numpy(
+    img: Image.Image,
+    threshold: int = 80,
+    min_fill: float = 0.2,
+    max_side: int = 600,
+) -> tuple[int, int, int, int] | None:
+    """
+    Find the bright page area on a dark background using row/column
+    projections of a downscaled grayscale copy.
+
+    :param threshold: gray level separating the page from the background
+    :param min_fill: min share of page pixels for a row/column to count
+    :param max_side: longest side of the downscaled copy
+    :return: (left, upper, right, lower) box in full resolution or None
+    """
+    factor = max(1, max(img.width, img.height) // max_side)
+    small = img.convert("L").reduce(factor)
+
+    mask = np.asarray(small) >= threshold
+
+    rows = np.flatnonzero(mask.mean(axis=1) >= min_fill)
+    cols = np.flatnonzero(mask.mean(axis=0) >= min_fill)
+    if rows.size == 0 or cols.size == 0:
+        return None
+
+    # Scale back up - the box may only grow by the reduction step
+    left = int(cols[0]) * factor
+    upper = int(rows[0]) * factor
+    right = min(img.width, (int(cols[-1]) + 1) * factor)
+    lower = min(img.height, (int(rows[-1]) + 1) * factor)
+
+    return left, upper, right, lower
+
+
+def crop_dark_background_image(
+    img: Image.Image, tool: str = "pillow"
+) -> tuple[Image.Image, bool]:
+    """
+    Crop the main content of an in-memory image with a dark background.
+
+    :param tool: "pillow" or "numpy"
+    :return: (image, True if the image was cropped)
+    """
+    if tool == "numpy":
+        bbox = find_page_bbox_numpy(img)
+        if bbox and bbox != (0, 0, img.width, img.height):
+            return img.crop(bbox), True
+
+        return img, False
+
+    if tool != "pillow":
+        raise ValueError("Invalid tool specified. Use 'pillow' or 'numpy'.")
+
+    # Convert to grayscale
+    gray = img.convert("L")
+    # Invert so that content is dark, background is white
+    inverted = ImageOps.invert(gray)
+    # Optional: enhance contrast
+    bw = inverted.point(lambda x: 0 if x < 30 else 255, mode="1")
+    bbox = bw.getbbox()
+    if bbox and (bbox[2] < img.width or bbox[3] < img.height):
+        return img.crop(bbox), True
+
+    return img, False
+
+
 def crop_dark_background_pillow(image_paths: list[Path]) -> int:
     cropped_count = 0
 
     for path in image_paths:
         with Image.open(path) as img:
-            # Convert to grayscale
-            gray = img.convert("L")
-            # Invert so that content is dark, background is white
-            inverted = ImageOps.invert(gray)
-            # Optional: enhance contrast
-            bw = inverted.point(lambda x: 0 if x < 30 else 255, mode="1")
-            bbox = bw.getbbox()
-            if bbox and (bbox[2] < img.width or bbox[3] < img.height):
-                cropped = img.crop(bbox)
+            cropped, was_cropped = crop_dark_background_image(img)
+            if was_cropped:
                 cropped.save(path)
                 cropped_count += 1
 
     return cropped_count
 
 
-def get_doi(texts_dir: Path) -> List[str]:
-    if not texts_dir or not texts_dir.exists() or not texts_dir.is_dir():
-        return []
+def _crop_dark_background_file_numpy(path: Path) -> bool:
+    with Image.open(path) as img:
+        cropped, was_cropped = crop_dark_background_image(img, tool="numpy")
+        if was_cropped:
+            cropped.save(path)
 
-    txt_files = sorted(texts_dir.glob("*.txt"))
-    if not txt_files:
-        return []
+    return was_cropped
+
+
+def crop_dark_background_numpy(image_paths: list[Path], jobs: int = None) -> int:
+    """
+    Crop images in parallel threads - decoding, NumPy and encoding
+    release the GIL for most of the work.
+    """
+    if not image_paths:
+        return 0
+
+    workers = jobs or os.cpu_count() or 1
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(_crop_dark_background_file_numpy, image_paths))
 
-    try:
-        content = txt_files[0].read_text(encoding="utf-8", errors="ignore")
-    except Exception:
-        return []
+
+def doi_page_window(total_pages: int, first: int = 1, last: int = 0) -> List[int]:
+    """1-based pages searched for DOIs - the first N then the last M pages."""
+    first_pages = range(1, min(first, total_pages) + 1)
+    last_pages = range(max(total_pages - last, first) + 1, total_pages + 1)
+
+    return list(first_pages) + list(last_pages)
+
+
+def find_dois(content: str) -> List[str]:
+    """DOI candidates in one text - normalized, in order of appearance."""
 
     # Normalize dashes → hyphen
     content = content.replace("\u2013", "-").replace("\u2014", "-")
@@ -363,25 +664,70 @@ def get_doi(texts_dir: Path) -> List[str]:
     # Replace remaining newlines with space
     content = content.replace("\n", " ")
 
-    matches = PAT_DOI.findall(content)
-
     # strip trailing punctuation & lowercase
-    matches = [m.rstrip(".,;:)\"'").lower() for m in matches]
-
-    seen = set()
-    deduped = []
-    for m in matches:
-        if m not in seen:
-            seen.add(m)
-            deduped.append(m)
-
-    final = []
-    for m in deduped:
-        if any(other != m and other.startswith(m) for other in deduped):
+    return [m.rstrip(".,;:)\"'").lower() for m in PAT_DOI.findall(content)]
+
+
+def dedup_dois(matches: List[str]) -> List[str]:
+    """
+    Drop duplicates and DOIs that are a prefix of a longer match (cut off
+    at a line break), keeping the order of appearance.
+    """
+    unique = list(dict.fromkeys(matches))
+
+    # Strings sharing a prefix sort right after it - only compare neighbours
+    ordered = sorted(unique)
+    truncated = {m for m, nxt in zip(ordered, ordered[1:]) if nxt.startswith(m)}
+
+    return [m for m in unique if m not in truncated]
+
+
+def get_doi(
+    texts_dir: Path = None,
+    text_pages: Dict[int, str] = None,
+    first: int = 1,
+    last: int = 0,
+    stop_on_match: bool = True,
+) -> List[str]:
+    """
+    Find DOIs in the first N and last M pages.
+
+    :param texts_dir: directory of page_NNN.txt files written by export_text
+    :param text_pages: {page number: text} already in memory - no re-read
+    :param first: search the first N pages
+    :param last: then the last M pages (e.g. a colophon)
+    :param stop_on_match: stop at the first page with a DOI
+    """
+    if text_pages is None:
+        if not texts_dir or not texts_dir.is_dir():
+            return []
+
+        text_pages = {
+            i: path for i, path in enumerate(sorted(texts_dir.glob("*.txt")), 1)
+        }
+
+    if not text_pages:
+        return []
+
+    # text_pages may hold just the window pages - same window either way
+    window = doi_page_window(max(text_pages), first=first, last=last)
+
+    matches = []
+    for page in window:
+        content = text_pages.get(page)
+        if content is None:
             continue
-        final.append(m)
+        if isinstance(content, Path):
+            try:
+                content = content.read_text(encoding="utf-8", errors="ignore")
+            except Exception:
+                continue
+
+        matches.extend(find_dois(content))
+        if matches and stop_on_match:
+            break
 
-    return final
+    return dedup_dois(matches)
 
 
 def write_json(data: Dict[str, Any], filepath: Path) -> None:
@@ -0,0 +1,149 @@
+from contextlib import contextmanager
+from itertools import count
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import pikepdf
+
+
+class DocumentContext:
+    """
+    Per-job cache of open documents shared by the pipeline stages.
+
+    Every PDF is opened at most once per library (fitz, pikepdf) and its
+    loaded fitz pages are kept until the file is rewritten - call
+    invalidate(path) before writing to a path that may be open.
+
+    Extracted page texts are kept per document content - a copy registered
+    with alias(copy, original) (e.g. tmp -> output PDF) reuses the texts
+    extracted while classifying the original.
+    """
+
+    def __init__(self):
+        self._fitz = {}
+        self._pikepdf = {}
+        self._pages = {}
+        self._texts = {}
+        self._contents = {}
+        self._content_ids = count()
+
+    @staticmethod
+    def _key(path) -> str:
+        return str(Path(path).resolve())
+
+    def _content_id(self, path) -> int:
+        key = self._key(path)
+        if key not in self._contents:
+            self._contents[key] = next(self._content_ids)
+        return self._contents[key]
+
+    def alias(self, copy, original):
+        """Register copy as a byte-identical copy of original."""
+        self.invalidate(copy)
+        self._contents[self._key(copy)] = self._content_id(original)
+
+    def fitz_doc(self, path) -> fitz.Document:
+        key = self._key(path)
+        if key not in self._fitz:
+            self._fitz[key] = fitz.open(key)
+        return self._fitz[key]
+
+    def pikepdf_doc(self, path) -> pikepdf.Pdf:
+        key = self._key(path)
+        if key not in self._pikepdf:
+            self._pikepdf[key] = pikepdf.open(key)
+        return self._pikepdf[key]
+
+    def page_count(self, path) -> int:
+        if not Path(path).is_file():
+            return 0
+
+        key = self._key(path)
+        if key in self._fitz:
+            return len(self._fitz[key])
+
+        return len(self.pikepdf_doc(path).pages)
+
+    def page(self, path, index: int) -> fitz.Page:
+        """Loaded fitz page (0-based index)."""
+        key = (self._key(path), index)
+        if key not in self._pages:
+            self._pages[key] = self.fitz_doc(path)[index]
+        return self._pages[key]
+
+    def page_text(
+        self, path, index: int, level: str = "text", store: bool = True
+    ) -> str:
+        """
+        Extracted page text (0-based index) - once per content and level.
+
+        :param store: keep a newly extracted text and its loaded page -
+            False for single pass consumers that must not grow the cache
+        """
+        key = (self._content_id(path), index, level)
+        if key in self._texts:
+            return self._texts[key]
+
+        if store:
+            text = self._texts[key] = self.page(path, index).get_text(level)
+        else:
+            page = self._pages.get((self._key(path), index))
+            if page is None:
+                page = self.fitz_doc(path)[index]
+            text = page.get_text(level)
+
+        return text
+
+    def invalidate(self, path):
+        """Close and forget a document - its file is about to change."""
+        key = self._key(path)
+
+        self._pages = {k: v for k, v in self._pages.items() if k[0] != key}
+
+        # Texts stay while an alias still holds the same content
+        content_id = self._contents.pop(key, None)
+        if content_id is not None and content_id not in self._contents.values():
+            self._texts = {k: v for k, v in self._texts.items() if k[0] != content_id}
+
+        doc = self._fitz.pop(key, None)
+        if doc is not None:
+            doc.close()
+
+        pdf = self._pikepdf.pop(key, None)
+        if pdf is not None:
+            pdf.close()
+
+    def close(self):
+        for key in list(self._fitz) + list(self._pikepdf):
+            self.invalidate(key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@contextmanager
+def fitz_document(path, ctx: DocumentContext = None):
+    """Shared fitz document from ctx, or a private one closed on exit."""
+    if ctx is not None:
+        yield ctx.fitz_doc(path)
+        return
+
+    doc = fitz.open(path)
+    try:
+        yield doc
+    finally:
+        doc.close()
+
+
+@contextmanager
+def pikepdf_document(path, ctx: DocumentContext = None):
+    """Shared pikepdf document from ctx, or a private one closed on exit."""
+    if ctx is not None:
+        yield ctx.pikepdf_doc(path)
+        return
+
+    with pikepdf.open(path) as pdf:
+        yield pdf
@@ -0,0 +1,109 @@
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+
+def _cpu_seconds() -> float:
+    """CPU time of this process plus its finished child processes."""
+    if resource is None:
+        return time.process_time()
+
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def _peak_rss_mb(children: bool = False) -> float | None:
+    """
+    High-water mark of the resident set size so far - never decreases.
+
+    :param children: the largest finished child process instead of this
+        one - render/OCR workers, tesseract, unpaper
+    """
+    if resource is None:
+        return None
+
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    maxrss = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS, KiB elsewhere
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+
+    return round(maxrss / unit, 1)
+
+
+def _size_bytes(path) -> int:
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return 0
+
+
+class StageMetrics:
+    """
+    Wall time, CPU time and bytes written per pipeline stage, plus the
+    process and child process peak RSS as of the end of the stage - these
+    are lifetime high-water marks, not per-stage peaks.
+
+    Disabled instances hand out a shared null context, so the stages cost
+    nothing to instrument when metrics are off.
+    """
+
+    _NULL = nullcontext()
+
+    def __init__(self, enabled: bool = False, log_path: Path = None):
+        self.enabled = enabled or log_path is not None
+        self.log_path = Path(log_path) if log_path else None
+        self.stages = []
+
+    def stage(self, name: str, *outputs):
+        """
+        Measure the enclosed block.
+
+        :param outputs: files or directories written by the stage - their
+            size afterwards is reported as bytes_written
+        """
+        if not self.enabled:
+            return self._NULL
+
+        return self._measure(name, outputs)
+
+    @contextmanager
+    def _measure(self, name, outputs):
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        try:
+            yield
+        finally:
+            record = {
+                "stage": name,
+                "wall_s": round(time.perf_counter() - wall_start, 4),
+                "cpu_s": round(_cpu_seconds() - cpu_start, 4),
+                "process_peak_rss_mb": _peak_rss_mb(),
+                "children_peak_rss_mb": _peak_rss_mb(children=True),
+            }
+            if outputs:
+                record["bytes_written"] = sum(_size_bytes(p) for p in outputs)
+            self.stages.append(record)
+
+    def as_list(self) -> list:
+        return list(self.stages)
+
+    def write_log(self, **fields):
+        """Append one JSON line with fields and all stages to log_path."""
+        if not self.enabled or self.log_path is None:
+            return
+
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps({**fields, "stages": self.stages}, default=str) + "\n"
+        with self.log_path.open("a", encoding="utf-8") as f:
+            f.write(line)
@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+
+from .common import parse_page_ranges
+
+
+@dataclass
+class PagePlan:
+    """
+    The input pages a job works on. Stages run on the working PDF holding
+    just these pages, so the work is proportional to the selection.
+    """
+
+    total_pages: int
+    pages: list[int]  # 1-based input page numbers, ascending
+
+    @classmethod
+    def from_ranges(cls, total_pages: int, extract_pages_str: str = None):
+        if extract_pages_str:
+            pages = parse_page_ranges(extract_pages_str, total_pages=total_pages)
+            pages = [p for p in pages if 1 <= p <= total_pages]
+        else:
+            pages = list(range(1, total_pages + 1))
+
+        return cls(total_pages=total_pages, pages=pages)
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.pages) == self.total_pages
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def input_page(self, work_page: int) -> int:
+        """Map a 1-based working PDF page to its input page number."""
+        return self.pages[work_page - 1]
+
+    def without(self, work_pages: list[int]) -> "PagePlan":
+        """A plan without the given 1-based working PDF pages."""
+        drop = set(work_pages)
+        pages = [p for i, p in enumerate(self.pages, start=1) if i not in drop]
+
+        return PagePlan(total_pages=self.total_pages, pages=pages)
+
+    def split_skip(
+        self, skip_pages: list[int], pages_per_sheet: int = 1
+    ) -> tuple[list[int], list[int]]:
+        """
+        Split output page numbers to skip (--skip-post) into working pages
+        that can be dropped before any processing and output pages that
+        still have to be skipped afterwards.
+
+        With pages_per_sheet=2 (--output-pages 2) every working page becomes
+        two output pages - it can be dropped only if both are skipped.
+
+        :return: (working pages to drop, output pages to skip in the
+            output of the reduced plan)
+        """
+        skip = set(skip_pages)
+        work_count = len(self.pages)
+
+        def outputs(work_page):
+            first = (work_page - 1) * pages_per_sheet + 1
+            return range(first, first + pages_per_sheet)
+
+        drop = [w for w in range(1, work_count + 1) if skip.issuperset(outputs(w))]
+
+        # Renumber the remaining skipped pages after the drop
+        dropped = set(drop)
+        skip_after = []
+        new_work_page = 0
+        for w in range(1, work_count + 1):
+            if w in dropped:
+                continue
+            new_work_page += 1
+            for j, o in enumerate(outputs(w)):
+                if o in skip:
+                    skip_after.append((new_work_page - 1) * pages_per_sheet + j + 1)
+
+        return drop, skip_after
@@ -0,0 +1,254 @@
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+JOB_SUFFIX = ".job"
+OWNER_FILE = ".owner.json"
+LOCK_FILE = ".quota.lock"
+LOCK_STALE_SECONDS = 30
+
+# Running jobs touch their owner file every HEARTBEAT_SECONDS; one not
+# touched for HEARTBEAT_STALE_SECONDS belongs to a dead job on any host
+HEARTBEAT_SECONDS = 10
+HEARTBEAT_STALE_SECONDS = 120
+
+# Rough workspace need of one scanned page at 300 DPI - rendered PNG,
+# unpaper PNM and the final PNG; scales with the square of the DPI
+SCAN_MB_PER_PAGE = 40
+
+
+def estimate_scan_mb(pages: int, dpi: int = 300) -> float:
+    return pages * SCAN_MB_PER_PAGE * (dpi / 300) ** 2
+
+
+def _pid_alive(pid: int) -> bool:
+    if sys.platform.startswith("win"):
+        # os.kill would terminate the process on Windows - assume alive
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _process_started(pid: int):
+    """Start time of pid in clock ticks since boot - None where unknown."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    # The command name may contain spaces - fields follow its closing ")"
+    return int(stat.rsplit(")", 1)[1].split()[19])
+
+
+def _owner_gone(owner: dict) -> bool:
+    """True when the process of a job on this host is known to be gone."""
+    if owner.get("host") != socket.gethostname():
+        return False
+    pid = owner.get("pid", 0)
+    if not _pid_alive(pid):
+        return True
+    # A live pid may have been recycled by another process
+    started = owner.get("started")
+    return started is not None and _process_started(pid) not in (None, started)
+
+
+def _dir_bytes(path: Path) -> int:
+    total = 0
+    for p in path.rglob("*"):
+        try:
+            if p.is_file():
+                total += p.stat().st_size
+        except FileNotFoundError:
+            pass
+    return total
+
+
+class WorkspaceQuotaError(RuntimeError):
+    pass
+
+
+class Workspace:
+    """
+    Private directory of one job - removed when the job ends. All the
+    job's intermediates (working PDFs, page images) are written into it.
+    """
+
+    def __init__(self, manager: "WorkspaceManager", path: Path):
+        self.manager = manager
+        self.path = path
+        self.reserved_mb = 0.0
+        self.waited = 0.0
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._beat, daemon=True)
+
+    def reserve(self, mb: float):
+        """Wait until mb fit into the quota next to the other jobs."""
+        self.waited += self.manager.reserve(self, mb)
+
+    def usage_bytes(self) -> int:
+        return _dir_bytes(self.path)
+
+    def _write_owner(self):
+        owner = {
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "started": _process_started(os.getpid()),
+            "reserved_mb": self.reserved_mb,
+        }
+        (self.path / OWNER_FILE).write_text(json.dumps(owner), encoding="utf-8")
+
+    def _beat(self):
+        while not self._stop.wait(HEARTBEAT_SECONDS):
+            try:
+                os.utime(self.path / OWNER_FILE)
+            except OSError:
+                return
+
+    def cleanup(self, keep: bool = False):
+        self._stop.set()
+        if keep:
+            # Left for inspection - no longer a running job
+            (self.path / OWNER_FILE).unlink(missing_ok=True)
+            return
+
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class WorkspaceManager:
+    """
+    Creates job workspaces under root and shares a disk quota between all
+    jobs using the root - threads and processes alike. Only the workspaces
+    count - the OCR cache has its own limit (--cache-size) and OCRmyPDF's
+    temp files are not included.
+
+    A job counts with the larger of its reservation and its actual size.
+    A reservation over the quota waits for other jobs to finish instead
+    of failing; a job alone is always let through.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        quota_mb: float = None,
+        wait_timeout: float = None,
+        poll_seconds: float = 1.0,
+    ):
+        self.root = Path(root)
+        self.quota_mb = quota_mb
+        self.wait_timeout = wait_timeout
+        self.poll_seconds = poll_seconds
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def job(self, name: str = "job", keep: bool = False, reserve_mb: float = 0):
+        """
+        Workspace for one job - removed on success and on failure.
+
+        :param keep: keep the files (e.g. with --debug)
+        """
+        path = Path(
+            tempfile.mkdtemp(prefix=f"{name[:40]}.", suffix=JOB_SUFFIX, dir=self.root)
+        )
+        workspace = Workspace(self, path)
+        workspace._write_owner()
+        workspace._heartbeat.start()
+        try:
+            if reserve_mb:
+                workspace.reserve(reserve_mb)
+            yield workspace
+        finally:
+            workspace.cleanup(keep=keep)
+
+    def _jobs(self):
+        for path in self.root.glob(f"*{JOB_SUFFIX}"):
+            owner_file = path / OWNER_FILE
+            try:
+                owner = json.loads(owner_file.read_text(encoding="utf-8"))
+                owner["age"] = time.time() - owner_file.stat().st_mtime
+            except (OSError, ValueError):
+                continue  # kept for debugging or just being created
+            yield path, owner
+
+    def remove_stale(self):
+        """
+        Remove workspaces of dead jobs - their heartbeat stopped, or they ran
+        on this host and their process is gone.
+        """
+        for path, owner in self._jobs():
+            if owner["age"] > HEARTBEAT_STALE_SECONDS or _owner_gone(owner):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def used_mb(self, exclude: Path = None) -> tuple:
+        """(MB used by the running jobs, number of those jobs)."""
+        used = 0.0
+        count = 0
+        for path, owner in self._jobs():
+            if path == exclude:
+                continue
+            actual = _dir_bytes(path) / (1024 * 1024)
+            used += max(owner.get("reserved_mb", 0), actual)
+            count += 1
+        return used, count
+
+    @contextmanager
+    def _lock(self):
+        lock = self.root / LOCK_FILE
+        while True:
+            try:
+                fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - lock.stat().st_mtime > LOCK_STALE_SECONDS:
+                        lock.unlink(missing_ok=True)  # holder crashed
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            lock.unlink(missing_ok=True)
+
+    def reserve(self, workspace: Workspace, mb: float) -> float:
+        """
+        Raise the reservation of workspace to mb, waiting while the other
+        jobs leave no room. Returns the seconds waited.
+
+        Reserve once per job, before its heavy stage - two jobs waiting to
+        grow reservations they already hold could wait for each other.
+        """
+        if not self.quota_mb or mb <= workspace.reserved_mb:
+            workspace.reserved_mb = max(workspace.reserved_mb, mb)
+            workspace._write_owner()
+            return 0.0
+
+        started = time.monotonic()
+        while True:
+            with self._lock():
+                self.remove_stale()
+                used, others = self.used_mb(exclude=workspace.path)
+                if others == 0 or used + mb <= self.quota_mb:
+                    workspace.reserved_mb = mb
+                    workspace._write_owner()
+                    return time.monotonic() - started
+
+            waited = time.monotonic() - started
+            if self.wait_timeout is not None and waited >= self.wait_timeout:
+                raise WorkspaceQuotaError(
+                    f"No room for {mb:.0f} MB within the {self.quota_mb:.0f} MB "
+                    f"workspace quota after {waited:.0f} s"
+                )
+            time.sleep(self.poll_seconds)
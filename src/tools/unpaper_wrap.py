@@ -1,10 +1,33 @@
+import hashlib
+import os
 import sys
 import subprocess
+import tempfile
+import time
 from pathlib import Path
 import logging
+from contextlib import contextmanager
 
 DOCKER_IMAGE = "unpaper-alpine"
 
+# Persistent mode - one long-lived container, calls dispatched by docker exec
+PERSISTENT_ENV = "UNPAPER_WRAP_PERSISTENT"
+WORKSPACE_ENV = "UNPAPER_WRAP_WORKSPACE"
+IDLE_ENV = "UNPAPER_WRAP_IDLE"
+LOG_ENV = "UNPAPER_WRAP_LOG"
+DEFAULT_IDLE_SECONDS = 300
+CONTAINER_WORKSPACE = "/work"
+START_LOCK_STALE_SECONDS = 60
+
+# Runs as the container's main process - exits after IDLE seconds without
+# a call, every call touches the marker file
+IDLE_WATCHDOG = (
+    "touch /tmp/.last-call; "
+    'while [ $(( $(date +%s) - $(stat -c %Y /tmp/.last-call) )) -lt "$0" ]; '
+    "do sleep 5; done"
+)
+EXEC_UNPAPER = 'touch /tmp/.last-call && exec unpaper "$@"'
+
 
 def find_project_root(marker="instance") -> Path:
     current = Path(__file__).resolve()
@@ -19,9 +42,10 @@ try:
 except RuntimeError as e:  # noqa: F841
     project_root = Path(__file__).resolve().parent
 
-log_dir = project_root / "instance" / "logs"
-log_dir.mkdir(parents=True, exist_ok=True)
-log_file = log_dir / "unpaper_wrap.log"
+log_file = Path(
+    os.environ.get(LOG_ENV) or project_root / "instance" / "logs" / "unpaper_wrap.log"
+)
+log_file.parent.mkdir(parents=True, exist_ok=True)
 
 log = logging.getLogger("unpaper_wrap")
 log.setLevel(logging.ERROR)
@@ -37,12 +61,181 @@ log.addHandler(fh)
 log.propagate = False
 
 
+def persistent_enabled() -> bool:
+    return os.environ.get(PERSISTENT_ENV, "").lower() in ("1", "true", "yes")
+
+
+def get_workspace() -> Path:
+    """
+    Host directory mounted into the persistent container - by default the
+    pdf-wtf temp dir, which holds the job workspaces.
+    """
+    workspace = os.environ.get(WORKSPACE_ENV) or os.environ.get("PDFWTF_TEMP_DIR")
+    if not workspace and (project_root / "instance").exists():
+        workspace = project_root / "instance" / "temp"
+    return Path(workspace or tempfile.gettempdir()).resolve()
+
+
+def get_idle_seconds() -> int:
+    try:
+        return int(os.environ.get(IDLE_ENV, DEFAULT_IDLE_SECONDS))
+    except ValueError:
+        return DEFAULT_IDLE_SECONDS
+
+
+def container_name(workspace: Path) -> str:
+    digest = hashlib.md5(str(workspace).encode("utf-8")).hexdigest()[:8]
+    return f"unpaper-wrap-{digest}"
+
+
+def container_state(name: str) -> bool | None:
+    """True running, False stopped, None no such container."""
+    result = subprocess.run(
+        ["docker", "inspect", "-f", "{{.State.Running}}", name],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() == "true"
+
+
+def container_running(name: str) -> bool:
+    return container_state(name) is True
+
+
+@contextmanager
+def start_lock(name: str):
+    """Serialize container startup between concurrent wrapper calls."""
+    lock = Path(tempfile.gettempdir()) / f"{name}.lock"
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock.stat().st_mtime > START_LOCK_STALE_SECONDS:
+                    lock.unlink(missing_ok=True)  # holder crashed
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.1)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        lock.unlink(missing_ok=True)
+
+
+def start_container(name: str, workspace: Path, idle_seconds: int):
+    with start_lock(name):
+        state = container_state(name)
+        if state:
+            return  # another call started it meanwhile
+
+        # A stopped container of the same name blocks the new one
+        if state is False:
+            subprocess.run(["docker", "rm", "-f", name], capture_output=True)
+
+        _run_container(name, workspace, idle_seconds)
+
+
+def _run_container(name: str, workspace: Path, idle_seconds: int):
+    docker_cmd = [
+        "docker",
+        "run",
+        "-d",
+        "--rm",
+        "--name",
+        name,
+        "-v",
+        f"{workspace}:{CONTAINER_WORKSPACE}",
+        "-e",
+        f"TMP={CONTAINER_WORKSPACE}",
+        "-e",
+        f"TEMP={CONTAINER_WORKSPACE}",
+        "--entrypoint",
+        "sh",
+        DOCKER_IMAGE,
+        "-c",
+        IDLE_WATCHDOG,
+        str(idle_seconds),
+    ]
+    log.debug("Starting container: %s", " ".join(docker_cmd))
+
+    result = subprocess.run(docker_cmd, capture_output=True, text=True)
+
+    # Another call may have started it in the meantime
+    if result.returncode != 0 and "already in use" in result.stderr:
+        return
+    if result.returncode != 0 and not container_running(name):
+        raise RuntimeError(f"Cannot start {name}: {result.stderr.strip()}")
+
+
+def ensure_container(name: str, workspace: Path, idle_seconds: int):
+    if not container_running(name):
+        start_container(name, workspace, idle_seconds)
+
+
+def to_container_path(path: Path, workspace: Path) -> str | None:
+    try:
+        relative = path.relative_to(workspace)
+    except ValueError:
+        return None
+    return f"{CONTAINER_WORKSPACE}/{relative.as_posix()}"
+
+
+def run_persistent(args, workspace: Path, idle_seconds: int) -> int | None:
+    """
+    Run unpaper in the long-lived container.
+
+    :return: unpaper exit code - None when a path lies outside the
+        workspace and the call has to go through docker run
+    """
+    container_args = []
+    for a in args:
+        if a.lower().endswith(".png") or a.lower().endswith(".pnm"):
+            path = Path(a).resolve()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            a = to_container_path(path, workspace)
+            if a is None:
+                return None
+        container_args.append(a)
+
+    name = container_name(workspace)
+    docker_cmd = ["docker", "exec", "-w", CONTAINER_WORKSPACE, name]
+    docker_cmd += ["sh", "-c", EXEC_UNPAPER, "unpaper"] + container_args
+
+    ensure_container(name, workspace, idle_seconds)
+    result = subprocess.run(docker_cmd)
+
+    # The container died (idle timeout, docker restart) - start it again once
+    if result.returncode != 0 and not container_running(name):
+        log.error("Container %s not running - restarting", name)
+        start_container(name, workspace, idle_seconds)
+        result = subprocess.run(docker_cmd)
+
+    return result.returncode
+
+
 def main():
     args = sys.argv[1:]
     if not args:
         log.info("Usage: unpaper_wrap.py [options] [input_file output_file]")
         sys.exit(0)
 
+    log.debug("Arguments received: %s", args)
+
+    if persistent_enabled():
+        try:
+            returncode = run_persistent(args, get_workspace(), get_idle_seconds())
+        except Exception as err:
+            log.error(f"Persistent unpaper failed: {str(err)}")
+            returncode = None
+
+        if returncode is not None:
+            sys.exit(returncode)
+
     options = []
     paths = []
 
@@ -52,8 +245,6 @@ def main():
         else:
             options.append(a)
 
-    log.debug("Arguments received: %s", args)
-
     # Handle calls like "--version" or "--help" (no input/output paths)
     if len(paths) < 2:
         docker_cmd = ["docker", "run", "--rm", DOCKER_IMAGE] + args
@@ -0,0 +1,88 @@
+import fitz
+from pdfwtf.utils.analyze import (
+    classify_pages,
+    is_scanned_or_hybrid,
+    select_sample_pages,
+)
+from pdfwtf.utils import context
+from pdfwtf.utils.context import DocumentContext
+
+TEXT = "This page has a proper born digital text layer with plenty of words."
+
+
+def _make_pdf(path, kinds):
+    doc = fitz.open()
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 50, 50), False)
+    pix.set_rect(pix.irect, (200, 200, 200))
+    for kind in kinds:
+        page = doc.new_page()
+        if kind in ("image", "hybrid"):
+            page.insert_image(page.rect, pixmap=pix)
+        if kind in ("text", "hybrid"):
+            page.insert_text((72, 72), TEXT)
+    doc.save(path)
+    doc.close()
+
+
+def test_select_sample_pages():
+    assert select_sample_pages(5) == [0, 1, 2, 3, 4]
+    assert select_sample_pages(100, first=2, spaced=3) == [0, 1, 50, 99]
+    assert select_sample_pages(3, first=10) == [0, 1, 2]
+    assert select_sample_pages(10, spaced=1) == [9]
+
+
+def test_classify_pages(tmp_path):
+    pdf = tmp_path / "mixed.pdf"
+    _make_pdf(pdf, ["image", "text", "hybrid", "image"])
+
+    result = classify_pages(pdf)
+    assert result["pages"] == {1: "image", 2: "text", 3: "hybrid", 4: "image"}
+    assert result["kind"] == "hybrid"
+    assert result["confidence"] == 1.0
+
+    result = classify_pages(pdf, first=1)
+    assert result["pages"] == {1: "image"}
+    assert result["kind"] == "scanned"
+    assert result["coverage"] == 0.25
+    assert result["confidence"] < 1.0
+
+    assert is_scanned_or_hybrid(pdf) is False
+    assert is_scanned_or_hybrid(pdf, first=1) is True
+
+    # A single pass over all pages leaves nothing behind in the context
+    with DocumentContext() as ctx:
+        result = classify_pages(pdf, ctx=ctx, store=False)
+        assert result["pages"] == {1: "image", 2: "text", 3: "hybrid", 4: "image"}
+        assert ctx._pages == {} and ctx._texts == {}
+
+
+def test_document_context_shares_pages(tmp_path, monkeypatch):
+    pdf = tmp_path / "mixed.pdf"
+    _make_pdf(pdf, ["image", "text", "text"])
+
+    opened = []
+    real_open = context.fitz.open
+    monkeypatch.setattr(
+        context.fitz, "open", lambda p: opened.append(p) or real_open(p)
+    )
+
+    with DocumentContext() as ctx:
+        assert classify_pages(pdf, ctx=ctx)["kind"] == "hybrid"
+        assert not is_scanned_or_hybrid(pdf, ctx=ctx)
+        assert TEXT in ctx.page_text(pdf, 1)
+        assert len(opened) == 1
+
+        # Texts follow the content - a copy is not extracted again
+        copy = tmp_path / "copy.pdf"
+        copy.write_bytes(pdf.read_bytes())
+        ctx.alias(copy, pdf)
+        assert ctx.page_text(copy, 2) == ctx.page_text(pdf, 2)
+        assert len(opened) == 1
+
+        # ... even after the original is gone
+        ctx.invalidate(pdf)
+        assert TEXT in ctx.page_text(copy, 1)
+        assert len(opened) == 1
+
+        ctx.page(pdf, 0)
+        assert len(opened) == 2
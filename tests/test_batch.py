@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from pdfwtf import batch
+from pdfwtf.batch import batch_path_prefix, collect_input_files, run_batch
+
+
+def test_collect_input_files(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "one.pdf").write_bytes(b"%PDF")
+    (tmp_path / "two.pdf").write_bytes(b"%PDF")
+    (tmp_path / "notes.txt").write_text("x")
+
+    file_list = tmp_path / "list.txt"
+    file_list.write_text(f"# comment\n{tmp_path / 'two.pdf'}\n\n", encoding="utf-8")
+
+    files = collect_input_files(input_dir=tmp_path, file_list=file_list)
+
+    assert files == [tmp_path / "a" / "one.pdf", tmp_path / "two.pdf"]
+
+
+def test_run_batch_reports_failures(tmp_path, monkeypatch):
+    def fake_process_pdf(input_pdf, output_dir, **options):
+        if input_pdf.name == "bad.pdf":
+            raise RuntimeError("broken xref")
+
+    monkeypatch.setattr(batch, "process_pdf", fake_process_pdf)
+
+    files = [tmp_path / "good.pdf", tmp_path / "bad.pdf"]
+    summary = run_batch(files, tmp_path / "out", workers=1, debug_flag=False)
+
+    assert summary["total"] == 2
+    assert summary["ok"] == 1
+    assert summary["failed"] == 1
+    assert summary["files"][1]["error"] == "RuntimeError: broken xref"
+
+    written = json.loads((tmp_path / "out" / batch.SUMMARY_JSON).read_text("utf-8"))
+    assert written["failed"] == 1
+
+
+def test_run_batch_same_names_in_other_dirs(tmp_path, monkeypatch):
+    written = []
+
+    def fake_process_pdf(input_pdf, output_dir, input_path_prefix=None, **options):
+        written.append(input_pdf)
+
+    monkeypatch.setattr(batch, "process_pdf", fake_process_pdf)
+
+    files = [tmp_path / "a" / "doc.pdf", tmp_path / "b" / "doc.pdf"]
+
+    # A flat output would let the second doc.pdf overwrite the first
+    with pytest.raises(ValueError, match="doc.pdf"):
+        run_batch(files, tmp_path / "out", workers=1)
+    assert written == []
+
+    prefix = batch_path_prefix(files)
+    assert prefix == str(tmp_path)
+    summary = run_batch(files, tmp_path / "out", workers=1, input_path_prefix=prefix)
+    assert summary["ok"] == 2
+
+    # Unique names stay flat; a list entry outside --indir widens the prefix
+    assert batch_path_prefix(files[:1]) is None
+    assert batch_path_prefix(files, input_dir=tmp_path / "a") == str(tmp_path)
+    assert batch_path_prefix(files[:1], input_dir=tmp_path / "a") == str(tmp_path / "a")
@@ -0,0 +1,65 @@
+import os
+from pdfwtf.utils.cache import OcrCache
+
+
+def test_ocr_cache_key_depends_on_content_and_options(tmp_path):
+    cache = OcrCache(cache_dir=tmp_path / "cache")
+    pdf = tmp_path / "in.pdf"
+    pdf.write_bytes(b"%PDF-1.7 one")
+
+    key = cache.make_key(pdf, languages="eng", dpi=300)
+    assert key == cache.make_key(pdf, dpi=300, languages="eng")
+    assert key != cache.make_key(pdf, languages="ces", dpi=300)
+
+    pdf.write_bytes(b"%PDF-1.7 two")
+    assert key != cache.make_key(pdf, languages="eng", dpi=300)
+
+
+def test_ocr_cache_hit_and_lru_eviction(tmp_path):
+    cache = OcrCache(cache_dir=tmp_path / "cache", max_mb=1)
+    src = tmp_path / "ocr.pdf"
+    out = tmp_path / "out.pdf"
+
+    assert cache.get("a", out) is False
+
+    src.write_bytes(b"a" * 400 * 1024)
+    cache.put("a", src)
+    src.write_bytes(b"b" * 400 * 1024)
+    cache.put("b", src)
+
+    # Make "a" older, then use it - "b" becomes the LRU entry
+    os.utime(cache.cache_dir / "a.pdf", (1, 1))
+    os.utime(cache.cache_dir / "b.pdf", (2, 2))
+    assert cache.get("a", out) is True
+    assert out.read_bytes()[:1] == b"a"
+
+    src.write_bytes(b"c" * 400 * 1024)
+    cache.put("c", src)
+
+    assert sorted(p.name for p in cache.cache_dir.glob("*.pdf")) == ["a.pdf", "c.pdf"]
+
+
+def test_ocr_cache_metadata(tmp_path):
+    cache = OcrCache(cache_dir=tmp_path / "cache", max_mb=1)
+    src = tmp_path / "ocr.pdf"
+    src.write_bytes(b"a" * 700 * 1024)
+
+    assert cache.get_meta("a") == {}
+    cache.put("a", src, meta={"rotated_pages": {"page_001.png": 90}})
+    assert cache.get_meta("a") == {"rotated_pages": {"page_001.png": 90}}
+
+    # Evicted together with its PDF
+    cache.put("b", src)
+    assert sorted(p.name for p in cache.cache_dir.iterdir()) == ["b.json", "b.pdf"]
+
+    # Rewritten without metadata - the old metadata does not linger
+    cache.put("b", src, meta={"rotated_pages": {"1": 90}})
+    cache.put("b", src)
+    assert cache.get_meta("b") == {}
+
+    # Orphaned metadata is removed once it is old enough
+    orphan = cache.cache_dir / "c.json"
+    orphan.write_text("{}")
+    os.utime(orphan, (1, 1))
+    cache.evict()
+    assert not orphan.exists()
@@ -0,0 +1,38 @@
+import json
+
+from pdfwtf.utils.metrics import StageMetrics
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = StageMetrics()
+    with metrics.stage("extract"):
+        pass
+
+    assert not metrics.enabled
+    assert metrics.as_list() == []
+
+
+def test_stage_metrics_and_log(tmp_path):
+    log = tmp_path / "logs" / "metrics.jsonl"
+    out = tmp_path / "out"
+    out.mkdir()
+
+    metrics = StageMetrics(log_path=log)
+    with metrics.stage("export", out):
+        (out / "a.txt").write_bytes(b"x" * 10)
+        (out / "b.txt").write_bytes(b"y" * 5)
+    with metrics.stage("classify"):
+        pass
+
+    stages = metrics.as_list()
+    assert [s["stage"] for s in stages] == ["export", "classify"]
+    assert stages[0]["bytes_written"] == 15
+    assert "bytes_written" not in stages[1]
+    assert stages[0]["wall_s"] >= 0 and stages[0]["cpu_s"] >= 0
+    assert {"process_peak_rss_mb", "children_peak_rss_mb"} <= stages[0].keys()
+
+    metrics.write_log(input="doc.pdf")
+    metrics.write_log(input="other.pdf")
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [line["input"] for line in lines] == ["doc.pdf", "other.pdf"]
+    assert lines[0]["stages"] == stages
@@ -0,0 +1,390 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import fitz
+from PIL import Image
+
+from pdfwtf import pipeline
+from pdfwtf.unpaper_run import get_sheet_runs
+
+
+def test_run_unpaper_pages_collects_failures(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_unpaper(
+        input_file, output_file, tmpdir, dpi=300, mode_args=None, env=None
+    ):
+        calls.append((input_file.name, output_file.name))
+        if input_file.name == "page_002.png":
+            raise RuntimeError("unpaper crashed")
+
+    monkeypatch.setattr(pipeline, "run_unpaper_simple", fake_unpaper)
+
+    files = [Path(f"page_{i:03d}.png") for i in range(1, 4)]
+    failures = pipeline.run_unpaper_pages(
+        files, tmp_path, tmp_path, unpaper_args=["--layout", "single"], jobs=3
+    )
+
+    assert sorted(calls) == [
+        ("page_001.png", "page_001.pnm"),
+        ("page_002.png", "page_002.pnm"),
+        ("page_003.png", "page_003.pnm"),
+    ]
+    assert failures == [{"file": "page_002.png", "error": "unpaper crashed"}]
+
+
+def _block_pdf(path: Path):
+    doc = fitz.open()
+    page = doc.new_page(width=200, height=200)
+    page.draw_rect(fitz.Rect(50, 50, 150, 150), color=None, fill=(0, 0, 0))
+    doc.save(path)
+    doc.close()
+
+
+def test_prepare_page_images_in_memory(tmp_path):
+    pdf_path = tmp_path / "scan.pdf"
+    _block_pdf(pdf_path)
+
+    out_dir = tmp_path / "scans"
+    info = pipeline.prepare_page_images(
+        pdf_path,
+        out_dir,
+        dpi=72,
+        fext="pnm",
+        correct_orientation=False,
+        remove_background=True,
+    )
+
+    assert info == {"rotated": {}, "cropped": ["page_001.pnm"]}
+    with Image.open(out_dir / "page_001.pnm") as img:
+        assert img.size == (100, 100)
+
+
+def test_process_scanned_in_memory_unpaper_failed(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "scan.pdf"
+    _block_pdf(pdf_path)
+
+    def fake_unpaper(
+        input_file, output_file, tmpdir, dpi=300, mode_args=None, env=None
+    ):
+        raise RuntimeError("unpaper crashed")
+
+    monkeypatch.setattr(pipeline, "get_unpaper_version", lambda: (True, "7.0"))
+    monkeypatch.setattr(pipeline, "run_unpaper_simple", fake_unpaper)
+
+    images_dir = tmp_path / "images"
+    pipeline._process_scanned(
+        pdf_path,
+        tmp_path / "scan-copy.pdf",
+        72,
+        "90",
+        None,
+        None,
+        False,
+        False,
+        "_scans",
+        images_dir,
+        in_memory_flag=True,
+        workspace=tmp_path,
+    )
+
+    # The PNM scans rendered for unpaper come back as PNG for OCR
+    assert [p.name for p in images_dir.iterdir()] == ["page_001.png"]
+
+
+def test_run_pdfocr_merges_in_page_order(tmp_path, monkeypatch):
+    img_dir = tmp_path / "images"
+    img_dir.mkdir()
+    for i in (2, 1, 3):
+        (img_dir / f"page_{i:03d}.png").write_bytes(b"")
+
+    def fake_pdfocr_page(img_file, language="eng"):
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), img_file.stem)
+        return doc.tobytes()
+
+    monkeypatch.setattr(pipeline, "_pdfocr_page", fake_pdfocr_page)
+
+    output_pdf = tmp_path / "out.pdf"
+    pipeline.run_pdfocr(img_dir, output_pdf, jobs=1)
+
+    with fitz.open(output_pdf) as doc:
+        texts = [page.get_text().strip() for page in doc]
+    assert texts == ["page_001", "page_002", "page_003"]
+
+
+def test_process_pdf_selective_ocr(tmp_path, monkeypatch):
+    text = "This page has a proper born digital text layer with plenty of words."
+    pdf = tmp_path / "hybrid.pdf"
+    doc = fitz.open()
+    for kind in ("text", "image", "text"):
+        page = doc.new_page(width=144, height=144)
+        if kind == "text":
+            page.insert_text((10, 72), text, fontsize=3)
+        else:
+            page.draw_rect(fitz.Rect(20, 20, 120, 120), color=None, fill=(0, 0, 0))
+    doc.save(pdf)
+    doc.close()
+
+    ocr_inputs = []
+
+    def fake_run_ocr(input_pdf, output_pdf, img_dir, **kwargs):
+        with fitz.open(input_pdf) as src:
+            ocr_inputs.append(len(src))
+            out = fitz.open()
+            for page in src:
+                out.new_page(width=144, height=144).insert_text((10, 72), "OCR")
+            out.save(output_pdf)
+
+    monkeypatch.setenv("PDFWTF_TEMP_DIR", str(tmp_path / "temp"))
+    monkeypatch.setattr(pipeline, "get_unpaper_version", lambda: (False, ""))
+    monkeypatch.setattr(pipeline, "correct_images_orientation", lambda *a, **k: {})
+    monkeypatch.setattr(pipeline, "run_ocr", fake_run_ocr)
+
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    pipeline.process_pdf(
+        pdf, out_dir, dpi=72, selective_ocr_flag=True, no_cache_flag=True
+    )
+
+    assert ocr_inputs == [1]
+    with fitz.open(out_dir / "hybrid.pdf") as result:
+        texts = [page.get_text().strip() for page in result]
+    assert texts == [text, "OCR", text]
+
+
+def test_process_pdf_ocr_cache_keyed_on_unpaper(tmp_path, monkeypatch):
+    pdf = tmp_path / "scan.pdf"
+    _block_pdf(pdf)
+
+    ocr_runs = []
+
+    def fake_run_ocr(input_pdf, output_pdf, img_dir, **kwargs):
+        ocr_runs.append(kwargs["unpaper_ok"])
+        with fitz.open(input_pdf) as src:
+            src.save(output_pdf)
+
+    def fake_unpaper(
+        input_file, output_file, tmpdir, dpi=300, mode_args=None, env=None
+    ):
+        raise RuntimeError("unpaper crashed")
+
+    unpaper = {"ok": False}
+    monkeypatch.setenv("PDFWTF_TEMP_DIR", str(tmp_path / "temp"))
+    monkeypatch.setenv("PDFWTF_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(pipeline, "get_unpaper_version", lambda: (unpaper["ok"], ""))
+    monkeypatch.setattr(pipeline, "run_unpaper_simple", fake_unpaper)
+    monkeypatch.setattr(
+        pipeline,
+        "correct_images_orientation",
+        lambda *a, **k: {"page_001.png": 90},
+    )
+    monkeypatch.setattr(pipeline, "run_ocr", fake_run_ocr)
+
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    meta_path = out_dir / "scan.meta.json"
+
+    pipeline.process_pdf(pdf, out_dir, dpi=72)
+    pipeline.process_pdf(pdf, out_dir, dpi=72)
+    assert ocr_runs == [False]
+    meta = json.loads(meta_path.read_text())
+    assert meta["ocr_cache"] == "hit"
+    assert meta["rotated_pages"] == {"1": 90}
+
+    # A result made without unpaper is not served once unpaper is available
+    unpaper["ok"] = True
+    pipeline.process_pdf(pdf, out_dir, dpi=72)
+    assert ocr_runs == [False, True]
+    assert json.loads(meta_path.read_text())["ocr_cache"] == "miss"
+
+
+def test_process_pdf_ocr_cache_keyed_on_pre_rotate(tmp_path, monkeypatch):
+    pdf = tmp_path / "scan.pdf"
+    _block_pdf(pdf)
+
+    ocr_runs = []
+    osd_runs = []
+
+    def fake_run_ocr(input_pdf, output_pdf, img_dir, **kwargs):
+        ocr_runs.append(input_pdf)
+        with fitz.open(input_pdf) as src:
+            src.save(output_pdf)
+
+    def fake_orientation(*args, **kwargs):
+        osd_runs.append(args)
+        return {}
+
+    monkeypatch.setenv("PDFWTF_TEMP_DIR", str(tmp_path / "temp"))
+    monkeypatch.setenv("PDFWTF_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(pipeline, "get_unpaper_version", lambda: (False, ""))
+    monkeypatch.setattr(pipeline, "correct_images_orientation", fake_orientation)
+    monkeypatch.setattr(pipeline, "run_ocr", fake_run_ocr)
+
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+
+    # Without unpaper, pre_rotate still changes the result (no OSD)
+    pipeline.process_pdf(pdf, out_dir, dpi=72)
+    pipeline.process_pdf(pdf, out_dir, dpi=72, pre_rotate="90")
+    assert len(ocr_runs) == 2 and len(osd_runs) == 1
+    meta = json.loads((out_dir / "scan.meta.json").read_text())
+    assert meta["ocr_cache"] == "miss"
+
+
+def test_process_pdf_rotated_pages_by_input_page(tmp_path, monkeypatch):
+    pdf = tmp_path / "scan.pdf"
+    doc = fitz.open()
+    for _ in range(3):
+        page = doc.new_page(width=144, height=144)
+        page.draw_rect(fitz.Rect(20, 20, 120, 120), color=None, fill=(0, 0, 0))
+    doc.save(pdf)
+    doc.close()
+
+    def fake_run_ocr(input_pdf, output_pdf, img_dir, **kwargs):
+        with fitz.open(input_pdf) as src:
+            src.save(output_pdf)
+
+    monkeypatch.setenv("PDFWTF_TEMP_DIR", str(tmp_path / "temp"))
+    monkeypatch.setattr(pipeline, "get_unpaper_version", lambda: (False, ""))
+    monkeypatch.setattr(
+        pipeline,
+        "correct_images_orientation",
+        lambda *a, **k: {"page_002.png": 90},
+    )
+    monkeypatch.setattr(pipeline, "run_ocr", fake_run_ocr)
+
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    pipeline.process_pdf(
+        pdf, out_dir, dpi=72, extract_pages_str="2-3", no_cache_flag=True
+    )
+
+    # The second working page is input page 3
+    meta = json.loads((out_dir / "scan.meta.json").read_text())
+    assert meta["rotated_pages"] == {"3": 90}
+
+
+def test_export_texts_single_pass(tmp_path):
+    pdf = tmp_path / "doc.pdf"
+    doc = fitz.open()
+    for i in range(1, 4):
+        doc.new_page().insert_text((72, 72), f"page {i} words here")
+    doc.save(pdf)
+    doc.close()
+
+    texts_dir = tmp_path / "texts"
+    text_pages = pipeline.export_texts(
+        pdf,
+        texts_dir,
+        summary_path=tmp_path / "doc.txt",
+        jsonl_path=tmp_path / "doc.jsonl",
+        structure="words",
+        keep_pages={1},
+    )
+
+    assert list(text_pages) == [1]
+    assert len(list(texts_dir.glob("page_*.txt"))) == 3
+    assert len(list(texts_dir.glob("page_*.words.json"))) == 3
+    assert "--- Page 3 of 3 ---" in (tmp_path / "doc.txt").read_text()
+
+    records = [json.loads(line) for line in open(tmp_path / "doc.jsonl")]
+    assert [r["page"] for r in records] == [1, 2, 3]
+    assert records[1]["words"] == 4
+
+
+def test_export_pdf_thumbnails(tmp_path):
+    pdf = tmp_path / "doc.pdf"
+    doc = fitz.open()
+    doc.new_page(width=595, height=842)
+    doc.new_page(width=842, height=595)
+    doc.save(pdf)
+    doc.close()
+
+    for fext in pipeline.THUMB_FORMATS:
+        thumbs_dir = tmp_path / fext
+        pipeline.export_pdf_thumbnails(pdf, thumbs_dir, fext=fext)
+
+        thumbs = sorted(thumbs_dir.glob(f"page_*.{fext}"))
+        assert len(thumbs) == 2
+        for thumb in thumbs:
+            with Image.open(thumb) as img:
+                assert max(img.size) == 400
+                assert min(img.size) < 300
+
+
+def test_run_unpaper_pages_batch_falls_back_per_page(tmp_path, monkeypatch):
+    files = [tmp_path / f"page_{i:03d}.png" for i in range(1, 6)]
+    runs = get_sheet_runs(files + [tmp_path / "cover.png"])
+    assert [(p and Path(p).name, len(s)) for p, s in runs] == [
+        ("page_%03d.png", 5),
+        (None, 1),
+    ]
+
+    batches = []
+
+    def fake_batch(input_pattern, output_pattern, tmpdir, start_sheet, end_sheet, **kw):
+        batches.append((start_sheet, end_sheet))
+        # Two outputs per sheet, stops with a partial output for sheet 3
+        for n in range(1, 6):
+            Path(output_pattern % n).write_text("pnm")
+        return SimpleNamespace(returncode=1, stdout="error")
+
+    single = []
+
+    def fake_unpaper(
+        input_file, output_file, tmpdir, dpi=300, mode_args=None, env=None
+    ):
+        single.append(input_file.name)
+        if input_file.name == "page_004.png":
+            raise RuntimeError("unpaper crashed")
+
+    monkeypatch.setattr(pipeline, "run_unpaper_batch", fake_batch)
+    monkeypatch.setattr(pipeline, "run_unpaper_simple", fake_unpaper)
+
+    pnm_dir = tmp_path / "pnm"
+    failures = pipeline.run_unpaper_pages(
+        files, pnm_dir, tmp_path, unpaper_args=[], output_pages="2", batch=True
+    )
+
+    assert batches == [(1, 5)]
+    assert sorted(p.name for p in pnm_dir.iterdir()) == [
+        "page_001_001.pnm",
+        "page_001_002.pnm",
+        "page_002_001.pnm",
+        "page_002_002.pnm",
+    ]
+    assert single == ["page_003.png", "page_004.png", "page_005.png"]
+    assert failures == [{"file": "page_004.png", "error": "unpaper crashed"}]
+
+
+def test_process_pdf_concurrent_jobs_on_same_file(tmp_path):
+    pdf = tmp_path / "doc.pdf"
+    doc = fitz.open()
+    for i in range(1, 5):
+        text = f"Page {i} has a proper born digital text layer with plenty of words."
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(pdf)
+    doc.close()
+
+    workspaces = tmp_path / "ws"
+
+    def job(i):
+        out_dir = tmp_path / f"out{i}"
+        out_dir.mkdir()
+        pipeline.process_pdf(
+            pdf,
+            out_dir,
+            extract_pages_str=f"1-{i}",
+            export_texts_flag=True,
+            workspace_dir=workspaces,
+        )
+        with fitz.open(out_dir / "doc.pdf") as out:
+            return len(out)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(job, range(1, 5))) == [1, 2, 3, 4]
+
+    assert list(workspaces.iterdir()) == []
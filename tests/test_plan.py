@@ -0,0 +1,47 @@
+import fitz
+from pdfwtf.utils.common import extract_pages
+from pdfwtf.utils.plan import PagePlan
+
+
+def test_page_plan_from_ranges():
+    plan = PagePlan.from_ranges(10, "2-3,9-")
+    assert plan.pages == [2, 3, 9, 10]
+    assert len(plan) == 4
+    assert not plan.is_full
+    assert plan.input_page(3) == 9
+
+    assert PagePlan.from_ranges(3).is_full
+    assert PagePlan.from_ranges(3, "2-20").pages == [2, 3]
+
+
+def test_extract_pages_keeps_only_selected(tmp_path):
+    src = tmp_path / "in.pdf"
+    doc = fitz.open()
+    for i in range(1, 8):
+        doc.new_page().insert_text((72, 72), f"page {i}")
+    doc.save(src)
+    doc.close()
+
+    out = tmp_path / "out.pdf"
+    extract_pages(src, out, pages_to_keep=PagePlan.from_ranges(7, "6,2").pages)
+
+    with fitz.open(out) as result:
+        assert [p.get_text().strip() for p in result] == ["page 2", "page 6"]
+
+
+def test_split_skip_single_pages():
+    plan = PagePlan.from_ranges(10, "3-7")  # working pages 1-5
+    drop, skip_after = plan.split_skip([1, 4])
+    assert drop == [1, 4]
+    assert skip_after == []
+
+    reduced = plan.without(drop)
+    assert reduced.pages == [4, 5, 7]
+
+
+def test_split_skip_output_pages_2():
+    plan = PagePlan.from_ranges(4)  # outputs 1-2, 3-4, 5-6, 7-8
+    drop, skip_after = plan.split_skip([1, 2, 3, 8], pages_per_sheet=2)
+    assert drop == [1]
+    # Working pages 2-4 become 1-3: old outputs 3 and 8 are now 1 and 6
+    assert skip_after == [1, 6]
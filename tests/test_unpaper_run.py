@@ -0,0 +1,53 @@
+import os
+
+from pdfwtf import unpaper_run
+
+FAKE_UNPAPER = """#!/bin/sh
+echo "$1" >> "$(dirname "$0")/calls.log"
+case "$1" in
+  --version) echo "7.0.0" ;;
+  --help) echo "  -s, --start-sheet   -e, --end-sheet   --start-output" ;;
+esac
+"""
+
+
+def _fake_unpaper(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    binary = bin_dir / "unpaper"
+    binary.write_text(FAKE_UNPAPER)
+    binary.chmod(0o755)
+
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("PDFWTF_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(unpaper_run, "_probe_cache", {})
+
+    return binary, bin_dir / "calls.log"
+
+
+def test_unpaper_probe_cached_in_process_and_on_disk(tmp_path, monkeypatch):
+    binary, calls = _fake_unpaper(tmp_path, monkeypatch)
+
+    assert unpaper_run.get_unpaper_version() == (True, "7.0.0")
+    assert unpaper_run.unpaper_supports("--start-sheet", "--start-output")
+    assert not unpaper_run.unpaper_supports("--no-such-flag")
+    assert calls.read_text().split() == ["--version", "--help"]
+
+    # A new process reads the disk cache
+    monkeypatch.setattr(unpaper_run, "_probe_cache", {})
+    assert unpaper_run.get_unpaper_info()["version"] == "7.0.0"
+    assert len(calls.read_text().split()) == 2
+
+    # A changed binary is probed again
+    stat = binary.stat()
+    os.utime(binary, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    unpaper_run.get_unpaper_info()
+    assert len(calls.read_text().split()) == 4
+
+
+def test_unpaper_missing(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    monkeypatch.setattr(unpaper_run, "_probe_cache", {})
+
+    assert unpaper_run.get_unpaper_version() == (False, "unpaper not found")
+    assert not unpaper_run.unpaper_supports("--start-sheet")
@@ -0,0 +1,146 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from pdfwtf.utils.common import get_temp_dir
+
+WRAP = Path(__file__).resolve().parents[1] / "src" / "tools" / "unpaper_wrap.py"
+
+# Fake docker CLI - keeps the container state in a file and "runs" unpaper
+# by copying the input to the output
+FAKE_DOCKER = """
+import json, os, shutil, sys
+from pathlib import Path
+
+state = Path(os.environ["FAKE_DOCKER_STATE"])
+running = state / "running"
+args = sys.argv[1:]
+with open(state / "calls.jsonl", "a") as f:
+    f.write(json.dumps(args) + "\\n")
+
+cmd = args[0]
+if cmd == "inspect":
+    if not running.exists():
+        sys.exit(1)
+    print("true")
+elif cmd == "rm":
+    if running.exists():
+        (state / "removed-running").touch()
+    running.unlink(missing_ok=True)
+elif cmd == "run" and "-d" in args:
+    if running.exists():
+        print("Conflict. The container name is already in use", file=sys.stderr)
+        sys.exit(125)
+    running.touch()
+elif cmd == "exec":
+    if not running.exists():
+        print("Error: container is not running", file=sys.stderr)
+        sys.exit(1)
+    if (state / "kill").exists():
+        (state / "kill").unlink()
+        running.unlink()
+        sys.exit(1)
+    workspace = os.environ["FAKE_DOCKER_WORKSPACE"]
+    paths = [a.replace("/work", workspace, 1) for a in args if a.startswith("/work/")]
+    shutil.copyfile(paths[-2], paths[-1])
+"""
+
+
+def _setup(tmp_path):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    docker = bin_dir / "docker"
+    docker.write_text(f"#!{sys.executable}\n{FAKE_DOCKER}")
+    docker.chmod(0o755)
+
+    state = tmp_path / "state"
+    state.mkdir()
+    workspace = tmp_path / "work"
+    workspace.mkdir()
+
+    env = dict(
+        os.environ,
+        PATH=f"{bin_dir}{os.pathsep}{os.environ['PATH']}",
+        FAKE_DOCKER_STATE=str(state),
+        FAKE_DOCKER_WORKSPACE=str(workspace),
+        UNPAPER_WRAP_PERSISTENT="1",
+        UNPAPER_WRAP_WORKSPACE=str(workspace),
+        UNPAPER_WRAP_LOG=str(tmp_path / "unpaper_wrap.log"),
+        TMPDIR=str(tmp_path),
+    )
+    return env, state, workspace
+
+
+def _unpaper(env, *args):
+    return subprocess.run([sys.executable, str(WRAP), *map(str, args)], env=env)
+
+
+def _calls(state):
+    with open(state / "calls.jsonl") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_persistent_container_reused_and_restarted(tmp_path):
+    env, state, workspace = _setup(tmp_path)
+    src = workspace / "page_001.png"
+    src.write_bytes(b"png")
+
+    for i in (1, 2):
+        result = _unpaper(env, "--dpi", "300", src, workspace / f"out{i}.pnm")
+        assert result.returncode == 0
+        assert (workspace / f"out{i}.pnm").read_bytes() == b"png"
+
+    calls = _calls(state)
+    assert sum(c[:2] == ["run", "-d"] for c in calls) == 1
+    assert sum(c[0] == "exec" for c in calls) == 2
+    assert "/work/page_001.png" in calls[-1]
+
+    # The container dies during the next call - restarted and retried
+    (state / "kill").touch()
+    assert _unpaper(env, src, workspace / "out3.pnm").returncode == 0
+    assert (workspace / "out3.pnm").exists()
+    assert sum(c[:2] == ["run", "-d"] for c in _calls(state)) == 2
+
+
+def test_paths_outside_workspace_use_docker_run(tmp_path):
+    env, state, workspace = _setup(tmp_path)
+    outside = tmp_path / "elsewhere"
+    outside.mkdir()
+
+    _unpaper(env, outside / "page_001.png", outside / "out.pnm")
+
+    calls = _calls(state)
+    assert [c[:2] for c in calls] == [["run", "--rm"]]
+
+
+def test_concurrent_cold_start_single_container(tmp_path):
+    env, state, workspace = _setup(tmp_path)
+    src = workspace / "page_001.png"
+    src.write_bytes(b"png")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(
+            pool.map(lambda i: _unpaper(env, src, workspace / f"out{i}.pnm"), range(8))
+        )
+
+    assert all(r.returncode == 0 for r in results)
+    calls = _calls(state)
+    assert sum(c[:2] == ["run", "-d"] for c in calls) == 1
+    assert not (state / "removed-running").exists()
+
+
+def test_default_workspace_is_pdfwtf_temp_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("UNPAPER_WRAP_LOG", str(tmp_path / "unpaper_wrap.log"))
+    monkeypatch.delenv("UNPAPER_WRAP_WORKSPACE", raising=False)
+    monkeypatch.delenv("PDFWTF_TEMP_DIR", raising=False)
+
+    spec = importlib.util.spec_from_file_location("unpaper_wrap", WRAP)
+    wrap = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(wrap)
+
+    # Job workspaces live under the temp dir - inside the mounted directory
+    assert wrap.get_workspace() == get_temp_dir()
@@ -1,5 +1,16 @@
 import pytest
 from pdfwtf.utils import parse_page_ranges
+from PIL import Image
+from pdfwtf.utils import common
+from pdfwtf.utils.common import (
+    chunk_list,
+    crop_dark_background,
+    dedup_dois,
+    doi_page_window,
+    find_page_bbox_numpy,
+    get_doi,
+    tool_env,
+)
 
 def test_single_page():
     assert parse_page_ranges("5", 10) == [5]
@@ -17,3 +28,128 @@ def test_invalid_page():
     with pytest.raises(ValueError):
         parse_page_ranges("11", 10)
 
+
+def test_chunk_list():
+    assert chunk_list([1, 2, 3, 4, 5], 2) == [[1, 2, 3], [4, 5]]
+    assert chunk_list([1, 2], 4) == [[1], [2]]
+    assert chunk_list([], 3) == []
+
+
+def test_correct_images_orientation_map(tmp_path, monkeypatch):
+    paths = []
+    for i, size in enumerate([(20, 10), (10, 20), (20, 10)], start=1):
+        path = tmp_path / f"page_{i:03d}.png"
+        Image.new("L", size, 255).save(path)
+        paths.append(path)
+
+    def fake_osd(img, config=""):
+        return {"rotate": 90 if img.width < img.height else 0}
+
+    monkeypatch.setattr(common, "tesseract_osd", fake_osd)
+
+    assert common.correct_images_orientation(paths, jobs=2) == {"page_002.png": 90}
+    with Image.open(paths[1]) as img:
+        assert img.size == (20, 10)
+
+
+def test_get_osd_workers(monkeypatch):
+    monkeypatch.setattr(common.os, "cpu_count", lambda: 8)
+    monkeypatch.setenv("OMP_THREAD_LIMIT", "4")
+    assert common.get_osd_workers() == 2
+    monkeypatch.setenv("OMP_THREAD_LIMIT", "1")
+    assert common.get_osd_workers(jobs=3) == 3
+
+
+def test_osd_single_threaded_unless_set(monkeypatch):
+    seen = []
+
+    def fake_run(cmd, input=None, capture_output=False, env=None):
+        seen.append((cmd[-2:], env.get("OMP_THREAD_LIMIT")))
+        stdout = b"Rotate: 90\nOrientation confidence: 3.5\n"
+        return common.subprocess.CompletedProcess(cmd, 0, stdout, b"")
+
+    monkeypatch.setattr(common.subprocess, "run", fake_run)
+    img = Image.new("L", (20, 10), 255)
+
+    # Limited per call - the process environment stays untouched
+    monkeypatch.delenv("OMP_THREAD_LIMIT", raising=False)
+    assert common.tesseract_osd(img) == {"rotate": 90, "orientation_conf": 3.5}
+    assert seen == [(["--psm", "0"], "1")]
+    assert "OMP_THREAD_LIMIT" not in common.os.environ
+
+    monkeypatch.setenv("OMP_THREAD_LIMIT", "4")
+    common.tesseract_osd(img, config="--dpi 100")
+    assert seen[-1] == (["--dpi", "100"], "4")
+
+
+def test_detect_rotation_downscaled_with_fallback(monkeypatch):
+    calls = []
+
+    def fake_osd(img, config=""):
+        calls.append((img.size, config))
+        if img.width < 300:
+            return {"rotate": 180, "orientation_conf": conf}
+        return {"rotate": 90, "orientation_conf": 10.0}
+
+    monkeypatch.setattr(common, "tesseract_osd", fake_osd)
+    img = Image.new("RGB", (600, 900), "white")
+
+    conf = 5.0
+    assert common.detect_rotation(img, src_dpi=300, osd_dpi=100) == 180
+    assert calls == [((200, 300), "--dpi 100")]
+
+    calls.clear()
+    conf = 0.5
+    assert common.detect_rotation(img, src_dpi=300, osd_dpi=100) == 90
+    assert [size for size, _ in calls] == [(200, 300), (600, 900)]
+
+
+def test_downscale_for_osd_fractional_scale():
+    img = Image.new("RGB", (600, 900), "white")
+
+    small, dpi = common.downscale_for_osd(img, src_dpi=300, osd_dpi=200)
+    assert (small.size, small.mode, dpi) == ((400, 600), "L", 200)
+
+    small, dpi = common.downscale_for_osd(img, src_dpi=300, max_pixels=300_000)
+    assert small.width * small.height <= 300_000 and dpi == 224
+
+    assert common.downscale_for_osd(img, src_dpi=300, osd_dpi=300) == (img, 300)
+
+
+def test_crop_dark_background_numpy(tmp_path):
+    img = Image.new("RGB", (1600, 2000), "black")
+    img.paste(Image.new("RGB", (800, 1200), (235, 235, 230)), (400, 400))
+
+    left, upper, right, lower = find_page_bbox_numpy(img)
+    assert abs(left - 400) <= 3 and abs(upper - 400) <= 3
+    assert abs(right - 1200) <= 3 and abs(lower - 1600) <= 3
+
+    path = tmp_path / "page_001.png"
+    img.save(path)
+    assert crop_dark_background([path], tool="numpy") == 1
+    with Image.open(path) as cropped:
+        assert abs(cropped.width - 800) <= 6 and abs(cropped.height - 1200) <= 6
+
+
+def test_get_doi_page_window():
+    assert doi_page_window(10, first=2, last=3) == [1, 2, 8, 9, 10]
+    assert doi_page_window(3, first=2, last=3) == [1, 2, 3]
+
+    text_pages = {i: "no identifier here" for i in range(1, 11)}
+    text_pages[10] = "see https://doi.org/10.1234/abc.5678. and doi.org/10.1234/abc"
+    assert get_doi(text_pages=text_pages) == []
+    assert get_doi(text_pages=text_pages, last=1) == ["10.1234/abc.5678"]
+
+
+def test_get_doi_prefix_dedup():
+    matches = ["10.1/ab", "10.2/x", "10.1/abc", "10.1/ab", "10.1/a"]
+    assert dedup_dois(matches) == ["10.2/x", "10.1/abc"]
+
+
+def test_tool_env_points_temp_at_job(tmp_path, monkeypatch):
+    monkeypatch.delenv("UNPAPER_WRAP_WORKSPACE", raising=False)
+    env = tool_env(tmp_path / "job", workspace_root=tmp_path)
+
+    assert {env[k] for k in ("TMPDIR", "TEMP", "TMP")} == {str(tmp_path / "job")}
+    assert env["UNPAPER_WRAP_WORKSPACE"] == str(tmp_path)
+    assert common.os.environ.get("TMPDIR") != str(tmp_path / "job")
@@ -0,0 +1,108 @@
+import json
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from pdfwtf.utils.workspace import (
+    HEARTBEAT_STALE_SECONDS,
+    JOB_SUFFIX,
+    OWNER_FILE,
+    WorkspaceManager,
+    WorkspaceQuotaError,
+    _process_started,
+)
+
+
+def test_workspace_removed_on_failure(tmp_path):
+    manager = WorkspaceManager(tmp_path / "jobs")
+
+    with pytest.raises(ValueError):
+        with manager.job("doc") as workspace:
+            (workspace.path / "page_001.png").write_bytes(b"png")
+            raise ValueError("boom")
+
+    assert not workspace.path.exists()
+
+
+def test_workspace_kept_for_debug(tmp_path):
+    manager = WorkspaceManager(tmp_path / "jobs", quota_mb=1)
+
+    with manager.job("doc", keep=True) as workspace:
+        (workspace.path / "page_001.png").write_bytes(b"png")
+
+    assert (workspace.path / "page_001.png").exists()
+    assert not (workspace.path / OWNER_FILE).exists()
+    # A kept workspace no longer counts against the quota
+    assert manager.used_mb() == (0.0, 0)
+
+
+def test_quota_waits_for_other_job(tmp_path):
+    manager = WorkspaceManager(tmp_path / "jobs", quota_mb=100, poll_seconds=0.05)
+    first_reserved = threading.Event()
+
+    def first_job():
+        with manager.job("first") as workspace:
+            workspace.reserve(80)
+            first_reserved.set()
+            time.sleep(0.3)
+
+    thread = threading.Thread(target=first_job)
+    thread.start()
+    first_reserved.wait()
+
+    with manager.job("second") as workspace:
+        workspace.reserve(50)
+        assert workspace.waited > 0
+        assert workspace.reserved_mb == 50
+
+    thread.join()
+    assert list((tmp_path / "jobs").iterdir()) == []
+
+
+def test_quota_wait_timeout(tmp_path):
+    manager = WorkspaceManager(
+        tmp_path / "jobs", quota_mb=100, wait_timeout=0.2, poll_seconds=0.05
+    )
+
+    with manager.job("first") as first:
+        first.reserve(80)
+        with pytest.raises(WorkspaceQuotaError):
+            with manager.job("second") as second:
+                second.reserve(50)
+
+        assert not second.path.exists()
+
+
+def test_remove_stale_owners(tmp_path):
+    manager = WorkspaceManager(tmp_path / "jobs")
+    here = socket.gethostname()
+    me = {"host": here, "pid": os.getpid(), "started": _process_started(os.getpid())}
+
+    def job(name, age=0, **owner):
+        path = manager.root / f"{name}{JOB_SUFFIX}"
+        path.mkdir()
+        (path / OWNER_FILE).write_text(json.dumps(owner), encoding="utf-8")
+        stamp = time.time() - age
+        os.utime(path / OWNER_FILE, (stamp, stamp))
+        return path
+
+    alive = job("alive", **me)
+    remote = job("remote", host="elsewhere", pid=2**22 + 1)
+    dead = job("dead", host=here, pid=2**22 + 1)
+    silent = job("silent", age=HEARTBEAT_STALE_SECONDS + 1, host="elsewhere", pid=1)
+    if me["started"] is not None:
+        recycled = job("recycled", **dict(me, started=me["started"] + 1))
+    else:
+        recycled = dead
+
+    manager.remove_stale()
+
+    assert alive.exists()
+    # Pids of other hosts mean nothing here - only their heartbeat counts
+    assert remote.exists()
+    assert not dead.exists()
+    assert not recycled.exists()
+    assert not silent.exists()